@@ -0,0 +1,384 @@
+from collections import OrderedDict
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.template import Context, Template
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+
+from utensils.context_processors import pagination
+
+from example.models import Author, Book
+from example.views import BookListView
+
+
+"""
+Times the example book list, the utensils template tags and middleware
+against a seeded SQLite database, e.g. to compare before and after a change:
+
+  PYTHONPATH=. django-admin.py benchmark --settings=example.settings_benchmark --rows 100000 --save before.json
+  PYTHONPATH=. django-admin.py benchmark --settings=example.settings_benchmark --rows 100000 --compare before.json
+"""
+
+# fmt: off
+ADJECTIVES = [
+    "Silent", "Crimson", "Hidden", "Broken", "Golden", "Last", "Lost", "Quiet",
+    "Burning", "Winter", "Distant", "Iron", "Secret", "Wild", "Empty", "Bright",
+]
+NOUNS = [
+    "Garden", "River", "Kingdom", "Letter", "Harbour", "Forest", "Mirror",
+    "Island", "Station", "Orchard", "Tower", "Voyage", "Promise", "Shadow",
+    "Summer", "Road", "House", "Machine", "Crown", "Field",
+]
+FIRST_NAMES = [
+    "Ann", "Bob", "Clara", "David", "Edith", "Frank", "Grace", "Henry",
+    "Iris", "James", "Kate", "Louis", "Mary", "Noel", "Olive", "Peter",
+]
+LAST_NAMES = [
+    "Smith", "Jones", "Brown", "Taylor", "Wilson", "Davies", "Evans",
+    "Thomas", "Roberts", "Walker", "Wright", "Hughes", "Green", "Hall",
+]
+# fmt: on
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds the example books and authors and reports requests per second, "
+        "query counts and peak memory for the list views, template tags and "
+        "middleware. Run with --settings=example.settings_benchmark."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=10000,
+            help="Number of books to seed, e.g. 10000, 100000 or 1000000.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=20,
+            help="Number of timed runs of each scenario.",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run this scenario (can be repeated).",
+        )
+        parser.add_argument(
+            "--reseed",
+            action="store_true",
+            help="Seed the database again even if it has the right number of rows.",
+        )
+        parser.add_argument(
+            "--save", metavar="PATH", help="Write the results to a JSON file."
+        )
+        parser.add_argument(
+            "--compare",
+            metavar="PATH",
+            help="Compare with the results saved in a JSON file, failing on "
+            "regressions.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.25,
+            help="Fraction the median time or peak memory may grow by before "
+            "--compare reports a regression.",
+        )
+
+    def seed(self, rows, reseed=False):
+        if not reseed and Book.objects.count() == rows:
+            return
+        self.stdout.write("Seeding {} books...".format(rows))
+        started = time.perf_counter()
+        rng = random.Random(rows)
+        with transaction.atomic():
+            Book.objects.all().delete()
+            Author.objects.all().delete()
+            Author.objects.bulk_create(
+                Author(
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES)
+                )
+                for i in range(max(10, rows // 100))
+            )
+            author_pks = list(Author.objects.values_list("pk", flat=True))
+            for start in range(0, rows, BATCH_SIZE):
+                Book.objects.bulk_create(
+                    Book(
+                        author_id=rng.choice(author_pks),
+                        title="The {} {} {}".format(
+                            rng.choice(ADJECTIVES), rng.choice(NOUNS), i
+                        ),
+                        publication_date=rng.randint(1850, 2015),
+                        in_stock=rng.random() < 0.7,
+                    )
+                    for i in range(start, min(rows, start + BATCH_SIZE))
+                )
+        self.stdout.write("Seeded in {:.1f}s.".format(time.perf_counter() - started))
+
+    def get_scenarios(self, rows):
+        """
+        Returns the requests to time, keyed by name. Each has a `path` and
+        optionally request `headers`, `settings` to override, a `prime` path
+        requested first, `conditional` to send the ETag of a first response
+        and the expected `status`.
+        """
+        last_page = max(1, math.ceil(rows / 20))
+        author = Author.objects.order_by("pk").values_list("pk", flat=True)[0]
+        middleware = tuple(settings.MIDDLEWARE_CLASSES)
+        return OrderedDict(
+            [
+                ("list", {"path": "/books/"}),
+                ("search", {"path": "/books/?search=garden"}),
+                # Across a reverse foreign key, most authors have several
+                # matching books.
+                ("search-related", {"path": "/authors/?search=garden"}),
+                ("sort", {"path": "/books/?sort-col=author&sort-dir=desc"}),
+                ("deep-page", {"path": "/books/?page={}".format(last_page)}),
+                ("facets", {"path": "/books/?in_stock=1&author={}".format(author)}),
+                ("fragment", {"path": "/books/", "headers": {"HTTP_X_PJAX": "true"}}),
+                (
+                    "not-modified",
+                    {"path": "/books/", "conditional": True, "status": 304},
+                ),
+                ("export", {"path": "/books/?export=csv"}),
+                ("autocomplete", {"path": "/books/autocomplete/?term=the+gar"}),
+                (
+                    "hidden-site",
+                    {
+                        "path": "/books/",
+                        "prime": "/books/?benchmark",
+                        "settings": {
+                            "HIDDEN_SITE_SECRET": "benchmark",
+                            "MIDDLEWARE_CLASSES": (
+                                "utensils.middleware.HiddenSiteMiddleware",
+                            )
+                            + middleware,
+                        },
+                    },
+                ),
+                (
+                    "instrumented",
+                    {
+                        "path": "/books/",
+                        "settings": {
+                            "MIDDLEWARE_CLASSES": middleware
+                            + ("utensils.middleware.InstrumentationMiddleware",)
+                        },
+                    },
+                ),
+            ]
+        )
+
+    def get_tag_scenarios(self, rows):
+        """
+        Returns the template tags to time, keyed by name, as (template source,
+        path of the list whose context they're rendered with).
+        """
+        path = "/books/?page={}&per-page=20&sort-col=title&sort-dir=asc".format(
+            max(1, math.ceil(rows / 40))
+        )
+        return OrderedDict(
+            [
+                ("pagination-tag", ("{% pagination %}", path)),
+                ("order-by-tag", ("{% order_by 'title' %}", path)),
+                (
+                    "filter-query-tag",
+                    ("{% filter_query 'page' 3 'per-page' 50 %}", path),
+                ),
+            ]
+        )
+
+    def measure(self, func, repeat):
+        # The first run warms up (and fills any caches) and counts the queries.
+        # Requests reset the query log when they start, so read it afterwards.
+        connection.force_debug_cursor = True
+        connection.queries_log.clear()
+        try:
+            func()
+        finally:
+            connection.force_debug_cursor = False
+        queries = len(connection.queries_log)
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        return {
+            "per_second": round(repeat / sum(timings), 1),
+            "median_ms": round(timings[len(timings) // 2] * 1000, 3),
+            "p95_ms": round(timings[min(repeat - 1, int(repeat * 0.95))] * 1000, 3),
+            "queries": queries,
+            "peak_memory_kb": round(peak / 1024, 1),
+        }
+
+    def run_scenario(self, name, scenario, repeat):
+        with override_settings(**scenario.get("settings", {})):
+            client = Client()
+            headers = dict(scenario.get("headers", {}))
+            if scenario.get("prime"):
+                client.get(scenario["prime"])
+            if scenario.get("conditional"):
+                headers["HTTP_IF_NONE_MATCH"] = client.get(scenario["path"])["ETag"]
+
+            def request():
+                response = client.get(scenario["path"], **headers)
+                if response.status_code != scenario.get("status", 200):
+                    raise CommandError(
+                        "{} returned {}".format(name, response.status_code)
+                    )
+                if response.streaming:
+                    for chunk in response.streaming_content:
+                        pass
+
+            return self.measure(request, repeat)
+
+    def run_tag_scenario(self, source, path, repeat):
+        request = RequestFactory().get(path)
+        view = BookListView(request=request, args=(), kwargs={})
+        view.search_form = view.make_form(request)
+        view.object_list = view.get_queryset()
+        context = view.get_context_data()
+        context["request"] = request
+        context.update(pagination(request))
+        template = Template("{% load utensils_tags %}" + source)
+        context = Context(context)
+
+        def render():
+            # The query builder is shared by the tags of one request.
+            request.__dict__.pop("_utensils_query_builder", None)
+            template.render(context)
+
+        return self.measure(render, repeat)
+
+    def get_commit(self):
+        try:
+            return (
+                subprocess.check_output(
+                    ["git", "rev-parse", "--short", "HEAD"],
+                    cwd=settings.BASE_DIR,
+                    stderr=subprocess.DEVNULL,
+                )
+                .decode()
+                .strip()
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def report(self, results):
+        self.stdout.write(
+            "{:<18} {:>10} {:>11} {:>10} {:>8} {:>12}".format(
+                "scenario", "per sec", "median ms", "p95 ms", "queries", "peak KB"
+            )
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                "{:<18} {per_second:>10} {median_ms:>11} {p95_ms:>10} "
+                "{queries:>8} {peak_memory_kb:>12}".format(name, **result)
+            )
+
+    def compare(self, run, baseline, tolerance):
+        if baseline.get("rows") != run["rows"]:
+            self.stderr.write(
+                "The baseline has {} rows, not {}.".format(
+                    baseline.get("rows"), run["rows"]
+                )
+            )
+        self.stdout.write(
+            "\nCompared with {}:".format(baseline.get("commit") or "baseline")
+        )
+        regressions = []
+        for name, result in run["results"].items():
+            before = baseline.get("results", {}).get(name)
+            if before is None:
+                continue
+            change = result["median_ms"] / before["median_ms"] - 1
+            memory = result["peak_memory_kb"] / max(before["peak_memory_kb"], 1) - 1
+            problems = []
+            if change > tolerance:
+                problems.append("slower")
+            if memory > tolerance:
+                problems.append("more memory")
+            if result["queries"] > before["queries"]:
+                problems.append("more queries")
+            self.stdout.write(
+                "{:<18} {:>+7.1%} time {:>+7.1%} memory {:>3} -> {:<3} queries {}".format(
+                    name,
+                    change,
+                    memory,
+                    before["queries"],
+                    result["queries"],
+                    ", ".join(problems),
+                )
+            )
+            if problems:
+                regressions.append(name)
+        if regressions:
+            raise CommandError("Regressions in: {}".format(", ".join(regressions)))
+
+    def handle(self, *args, **options):
+        if not getattr(settings, "BENCHMARK", False):
+            raise CommandError(
+                "Seeding replaces the books and authors, "
+                "run with --settings=example.settings_benchmark."
+            )
+        rows = options["rows"]
+        repeat = max(1, options["repeat"])
+        call_command("migrate", verbosity=0, interactive=False)
+        self.seed(rows, options["reseed"])
+
+        scenarios = self.get_scenarios(rows)
+        tag_scenarios = self.get_tag_scenarios(rows)
+        names = options["scenarios"] or list(scenarios) + list(tag_scenarios)
+        unknown = set(names) - set(scenarios) - set(tag_scenarios)
+        if unknown:
+            raise CommandError(
+                "Unknown scenario: {}. Choose from {}.".format(
+                    ", ".join(sorted(unknown)),
+                    ", ".join(list(scenarios) + list(tag_scenarios)),
+                )
+            )
+
+        results = OrderedDict()
+        for name in names:
+            if name in scenarios:
+                results[name] = self.run_scenario(name, scenarios[name], repeat)
+            else:
+                results[name] = self.run_tag_scenario(*tag_scenarios[name], repeat)
+        self.report(results)
+
+        run = {
+            "commit": self.get_commit(),
+            "rows": rows,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "results": results,
+        }
+        if options["save"]:
+            with open(options["save"], "w") as f:
+                json.dump(run, f, indent=2)
+        if options["compare"]:
+            with open(options["compare"]) as f:
+                baseline = json.load(f)
+            self.compare(run, baseline, options["tolerance"])
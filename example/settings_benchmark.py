@@ -0,0 +1,28 @@
+"""
+Settings for the `benchmark` management command, which seeds and times its
+own SQLite database so it never touches the example's db.sqlite3.
+"""
+
+from .settings import *  # noqa
+
+
+BENCHMARK = True
+
+DEBUG = False
+TEMPLATE_DEBUG = False
+ALLOWED_HOSTS = ["testserver"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "benchmark.sqlite3"),
+    }
+}
+
+# Keep request logging out of the timings.
+UTENSILS_INSTRUMENTATION_SINKS = []
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "loggers": {"utensils.instrumentation": {"level": "ERROR"}},
+}
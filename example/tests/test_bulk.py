@@ -0,0 +1,126 @@
+from datetime import timedelta
+
+from django.conf.urls import url
+from django.contrib.messages import get_messages
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from utensils.viewmixins import MessageMixin
+from utensils.views import BulkSetModelFieldView, SetModelFieldView
+
+from example.models import Book
+
+from .test_views import BookListTestCase
+
+
+class BooksOutOfStockView(BulkSetModelFieldView):
+    model = Book
+    field = "in_stock"
+    value = False
+    success_url = "/books/"
+    check_modified = True
+
+
+class BookOutOfStockView(SetModelFieldView):
+    model = Book
+    field = "in_stock"
+    value = False
+    success_url = "/books/"
+    check_modified = True
+
+
+class BooksOutOfStockMessageView(MessageMixin, BooksOutOfStockView):
+    success_message = "{updated} book(s) marked out of stock."
+    error_message = "{skipped} book(s) were skipped."
+
+
+class BookOutOfStockMessageView(MessageMixin, BookOutOfStockView):
+    success_message = "Marked out of stock."
+    error_message = "Changed by someone else."
+
+
+urlpatterns = [
+    url(r"^books/out-of-stock/$", BooksOutOfStockView.as_view()),
+    url(r"^books/(?P<pk>\d+)/out-of-stock/$", BookOutOfStockView.as_view()),
+    url(r"^messages/out-of-stock/$", BooksOutOfStockMessageView.as_view()),
+    url(r"^messages/(?P<pk>\d+)/out-of-stock/$", BookOutOfStockMessageView.as_view()),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class SetModelFieldTest(BookListTestCase):
+    def setUp(self):
+        self.books = list(Book.objects.filter(in_stock=True).order_by("pk")[:3])
+        self.modified = max(book.modified for book in self.books)
+
+    def post(self, data):
+        request = RequestFactory().post("/books/out-of-stock/", data)
+        view = BooksOutOfStockView(request=request, args=(), kwargs={})
+        return view.dispatch(request), view.set_values_summary
+
+    def test_invalid_pk(self):
+        response = self.client.post(
+            "/books/out-of-stock/",
+            {"pk": ["abc"], "modified": self.modified.isoformat()},
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get("/books/out-of-stock/?pk=abc")
+        self.assertEqual(response.status_code, 400)
+
+    def test_skipped_only_existing(self):
+        Book.objects.filter(pk=self.books[0].pk).update(
+            modified=self.modified + timedelta(days=1)
+        )
+        pks = [book.pk for book in self.books] + [999999]
+        response, summary = self.post(
+            {"pk": pks, "modified": self.modified.isoformat()}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(summary, {"updated": 2, "skipped": 1})
+        self.assertTrue(Book.objects.get(pk=self.books[0].pk).in_stock)
+
+    def test_bulk_requires_modified(self):
+        pks = [book.pk for book in self.books]
+        for modified in (None, "yesterday", "2015-13-45T00:00:00"):
+            data = {"pk": pks}
+            if modified:
+                data["modified"] = modified
+            response = self.client.post("/books/out-of-stock/", data)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(Book.objects.filter(pk__in=pks, in_stock=True).count(), 3)
+
+    def test_single_requires_modified(self):
+        path = "/books/{}/out-of-stock/".format(self.books[0].pk)
+        self.assertEqual(self.client.post(path).status_code, 400)
+        self.assertTrue(Book.objects.get(pk=self.books[0].pk).in_stock)
+        response = self.client.post(path, {"modified": self.books[0].modified})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Book.objects.get(pk=self.books[0].pk).in_stock)
+
+    def get_messages(self, response):
+        return [str(message) for message in get_messages(response.wsgi_request)]
+
+    def test_bulk_messages(self):
+        data = {"pk": ["abc"], "modified": self.modified.isoformat()}
+        response = self.client.post("/messages/out-of-stock/", data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_messages(response), [])
+        response = self.client.post("/messages/out-of-stock/", {"pk": [1]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_messages(response), [])
+        data["pk"] = [book.pk for book in self.books]
+        response = self.client.post("/messages/out-of-stock/", data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            self.get_messages(response), ["3 book(s) marked out of stock."]
+        )
+
+    def test_single_messages(self):
+        book = self.books[0]
+        path = "/messages/{}/out-of-stock/".format(book.pk)
+        response = self.client.post(path)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.get_messages(response), [])
+        response = self.client.post(path, {"modified": book.modified})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.get_messages(response), ["Marked out of stock."])
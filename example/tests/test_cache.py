@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.conf.urls import url
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from countries_plus.models import Country
+
+from utensils.cache import invalidate_list_cache
+from utensils.viewmixins import CachedListMixin
+
+from example.models import Book
+from example.views import BookListView
+
+from .test_views import BookListTestCase
+
+
+class CachedBookListView(CachedListMixin, BookListView):
+    cache_alias = "lists"
+
+
+urlpatterns = [
+    url(r"^books/$", CachedBookListView.as_view(), name="book_list"),
+    url(r"^shelf/(?P<shelf>\w+)/$", CachedBookListView.as_view(), name="shelf"),
+    url(r"^books/(?P<pk>\d+)/edit/$", BookListView.as_view(), name="book_edit"),
+    url(
+        r"^books/(?P<pk>\d+)/toggle-in-stock/$",
+        BookListView.as_view(),
+        name="book_toggle_in_stock",
+    ),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class CachedListTest(BookListTestCase):
+    def setUp(self):
+        caches["default"].clear()
+        caches["lists"].clear()
+
+    def get(self, path):
+        """
+        Returns the titles on the page and whether it came from the cache,
+        in which case its books are fetched by primary key.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        titles = [book.title for book in response.context["object_list"]]
+        cached = any('"example_book"."id" IN (' in q["sql"] for q in queries)
+        return titles, cached
+
+    def test_cached(self):
+        titles, cached = self.get("/books/")
+        self.assertFalse(cached)
+        self.assertEqual(self.get("/books/"), (titles, True))
+
+    def test_invalidated_in_alias(self):
+        self.get("/books/")
+        Book.objects.get(title="Book 00").delete()
+        titles, cached = self.get("/books/")
+        self.assertFalse(cached)
+        self.assertNotIn("Book 00", titles)
+        self.assertTrue(self.get("/books/")[1])
+        # Changes without signals bump the counter in the view's alias too.
+        Book.objects.filter(title="Book 01").update(title="Book 99")
+        invalidate_list_cache(Book)
+        self.assertFalse(self.get("/books/")[1])
+
+    def test_key_includes_path_and_query(self):
+        self.get("/books/?search=smith")
+        self.assertFalse(self.get("/shelf/a/?search=smith")[1])
+        self.assertFalse(self.get("/shelf/b/?search=smith")[1])
+        self.assertFalse(self.get("/shelf/a/?search=smith&in_stock=1")[1])
+        self.assertTrue(self.get("/shelf/a/?in_stock=1&search=smith&page=1")[1])
+
+    def test_unrelated_model(self):
+        with mock.patch("utensils.cache.invalidate_list_cache") as invalidate:
+            Country.objects.get(iso="FR").save()
+            Book.objects.first().save()
+        invalidate.assert_called_once_with(Book)
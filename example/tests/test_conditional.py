@@ -0,0 +1,71 @@
+from datetime import timedelta
+
+from django.conf.urls import url
+from django.test.utils import override_settings
+
+from example.models import Book
+from example.views import ToggleNotInStockView
+
+from .test_views import BookListTestCase
+
+
+urlpatterns = [
+    url(r"^books/(?P<pk>\d+)/toggle/$", ToggleNotInStockView.as_view()),
+    url(
+        r"^books/(?P<pk>\d+)/checked-toggle/$",
+        ToggleNotInStockView.as_view(check_modified=True),
+    ),
+    url(r"^books/$", ToggleNotInStockView.as_view(), name="book_list"),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ConditionalObjectTest(BookListTestCase):
+    def setUp(self):
+        self.book = Book.objects.filter(in_stock=True).first()
+        self.path = "/books/{}/toggle/".format(self.book.pk)
+
+    def test_not_modified(self):
+        response = self.client.get(self.path)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.path, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(
+            self.path, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_modified(self):
+        etag = self.client.get(self.path)["ETag"]
+        Book.objects.filter(pk=self.book.pk).update(
+            modified=self.book.modified + timedelta(seconds=1)
+        )
+        response = self.client.get(self.path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_if_match(self):
+        etag = self.client.get(self.path)["ETag"]
+        response = self.client.post(self.path, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Book.objects.get(pk=self.book.pk).in_stock)
+
+    def test_stale_if_match(self):
+        etag = self.client.get(self.path)["ETag"]
+        Book.objects.filter(pk=self.book.pk).update(
+            modified=self.book.modified + timedelta(seconds=1)
+        )
+        response = self.client.post(self.path, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 412)
+        self.assertTrue(Book.objects.get(pk=self.book.pk).in_stock)
+
+    def test_missing_modified(self):
+        path = "/books/{}/checked-toggle/".format(self.book.pk)
+        self.assertEqual(self.client.post(path).status_code, 400)
+        response = self.client.post(path, {"modified": "not a date"})
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Book.objects.get(pk=self.book.pk).in_stock)
+        response = self.client.post(path, {"modified": self.book.modified.isoformat()})
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Book.objects.get(pk=self.book.pk).in_stock)
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from countries_plus.models import Country
+
+from utensils.export import export_rows
+
+from example.models import Author, Book
+
+
+class ExportRowsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # By name France comes first, by primary key Germany does.
+        de, created = Country.objects.get_or_create(
+            iso="DE", defaults={"iso3": "DEU", "iso_numeric": 276, "name": "Germany"}
+        )
+        fr, created = Country.objects.get_or_create(
+            iso="FR", defaults={"iso3": "FRA", "iso_numeric": 250, "name": "France"}
+        )
+        for i in range(20):
+            author = Author.objects.create(
+                first_name="Author", last_name=str(i), country=[None, de, fr][i % 3]
+            )
+            Book.objects.create(author=author, title=str(i), publication_date=1900 + i)
+
+    def test_nullable_sort_column(self):
+        for ordering in (["country", "pk"], ["-country", "-pk"]):
+            rows = list(
+                export_rows(Author.objects.all(), ["pk"], ordering, chunk_size=3)
+            )
+            self.assertEqual(len(rows), Author.objects.count())
+            self.assertEqual(len(set(rows)), len(rows))
+
+    def test_nullable_related_sort_column(self):
+        rows = list(
+            export_rows(
+                Book.objects.all(), ["title"], ["author__country", "pk"], chunk_size=3
+            )
+        )
+        self.assertEqual(len(rows), Book.objects.count())
+        self.assertEqual(len(set(rows)), len(rows))
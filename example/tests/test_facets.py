@@ -0,0 +1,50 @@
+from django.db.models import Q
+
+from utensils.facets import BooleanFacet, RangeFacet, RelatedFacet, facet_counts
+
+from example.models import Author, Book
+
+from .test_views import BookListTestCase
+
+
+class FacetCountsTest(BookListTestCase):
+    def setUp(self):
+        self.facets = [
+            BooleanFacet("in_stock"),
+            RangeFacet("publication_date", [(None, 1920), (1920, 1940), (1940, None)]),
+        ]
+
+    def test_single_query(self):
+        active = {"in_stock": Q(in_stock=True)}
+        with self.assertNumQueries(1):
+            results = facet_counts(Book.objects.all(), self.facets, active)
+        in_stock, publication_date = [options for facet, options in results]
+        self.assertEqual(
+            in_stock,
+            [
+                ("1", "Yes", Book.objects.filter(in_stock=True).count()),
+                ("0", "No", Book.objects.filter(in_stock=False).count()),
+            ],
+        )
+        # The other facets' counts include the chosen option.
+        self.assertEqual(
+            [count for value, label, count in publication_date],
+            [
+                Book.objects.filter(in_stock=True, publication_date__lt=1920).count(),
+                Book.objects.filter(
+                    in_stock=True, publication_date__gte=1920, publication_date__lt=1940
+                ).count(),
+                Book.objects.filter(in_stock=True, publication_date__gte=1940).count(),
+            ],
+        )
+
+    def test_related_facet(self):
+        # One query finds the authors, the counts are still a single query.
+        facets = self.facets + [RelatedFacet("author")]
+        for i in range(5):
+            Author.objects.create(first_name="Unused", last_name=str(i))
+        with self.assertNumQueries(2):
+            results = facet_counts(Book.objects.all(), facets, {})
+        authors = results[2][1]
+        self.assertEqual(len(authors), 2)
+        self.assertEqual(sum(count for value, label, count in authors), 45)
@@ -0,0 +1,65 @@
+from django.forms import modelformset_factory
+from django.forms.models import BaseModelFormSet
+from django.test import TestCase
+
+from utensils.forms import UniqueModelFieldsFormSetMixin
+
+from example.forms import BookForm
+from example.models import Author, Book
+
+
+class OneBookPerAuthorForm(BookForm):
+    unique_fields = ["author", {"field": "title", "case_insensitive": True}]
+
+
+class OneBookPerAuthorFormSet(UniqueModelFieldsFormSetMixin, BaseModelFormSet):
+    unique_fields = ["author"]
+
+
+class UniqueModelFieldsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.smith = Author.objects.create(first_name="Ann", last_name="Smith")
+        cls.jones = Author.objects.create(first_name="Bob", last_name="Jones")
+        cls.book = Book.objects.create(
+            author=cls.smith, title="Great Expectations", publication_date=1861
+        )
+
+    def get_data(self, author, title):
+        return {
+            "author": author.pk,
+            "title": title,
+            "publication_date": 1900,
+            "in_stock": True,
+        }
+
+    def test_foreign_key(self):
+        with self.assertNumQueries(2):
+            # One to look up the author, one for the unique fields.
+            form = OneBookPerAuthorForm(self.get_data(self.smith, "Bleak House"))
+            self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ["author"])
+        form = OneBookPerAuthorForm(self.get_data(self.jones, "Bleak House"))
+        self.assertTrue(form.is_valid())
+
+    def test_case_insensitive(self):
+        form = OneBookPerAuthorForm(self.get_data(self.jones, "GREAT expectations"))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ["title"])
+
+    def test_own_instance(self):
+        form = OneBookPerAuthorForm(
+            self.get_data(self.smith, "Great Expectations"), instance=self.book
+        )
+        self.assertTrue(form.is_valid())
+
+    def test_formset_foreign_key(self):
+        FormSet = modelformset_factory(
+            Book, form=BookForm, formset=OneBookPerAuthorFormSet, extra=0
+        )
+        data = {"form-TOTAL_FORMS": 1, "form-INITIAL_FORMS": 0}
+        for key, value in self.get_data(self.smith, "Bleak House").items():
+            data["form-0-" + key] = value
+        formset = FormSet(data, queryset=Book.objects.none())
+        self.assertFalse(formset.is_valid())
+        self.assertIn("author", formset.forms[0].errors)
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+
+from utensils.instrumentation import MemorySink, StatsdSink
+from utensils.middleware import InstrumentationMiddleware
+
+from example.models import Book
+
+
+SINKS = ["utensils.instrumentation.MemorySink"]
+
+
+@override_settings(
+    UTENSILS_INSTRUMENTATION_SINKS=SINKS,
+    MIDDLEWARE_CLASSES=tuple(settings.MIDDLEWARE_CLASSES)
+    + ("utensils.middleware.InstrumentationMiddleware",),
+)
+class InstrumentationMiddlewareTest(TestCase):
+    def setUp(self):
+        MemorySink.clear()
+        self.addCleanup(MemorySink.clear)
+
+    def test_old_style(self):
+        response = self.client.get("/books/")
+        self.assertIn("Server-Timing", response)
+        self.assertEqual(len(MemorySink.records), 1)
+        record = MemorySink.records[0]
+        self.assertEqual(record["view"], "example.views.BookListView")
+        self.assertEqual(record["status"], 200)
+
+    def test_new_style(self):
+        def get_response(request):
+            Book.objects.count()
+            return HttpResponse()
+
+        middleware = InstrumentationMiddleware(get_response)
+        response = middleware(RequestFactory().get("/"))
+        self.assertIn("Server-Timing", response)
+        self.assertEqual(MemorySink.records[0]["total"]["queries"], 1)
+
+
+class StatsdSinkTest(SimpleTestCase):
+    def test_query_counts_are_gauges(self):
+        sink = StatsdSink(prefix="test")
+        record = {
+            "view": "example.views.BookListView",
+            "phases": {"render": {"duration": 1.5, "queries": 2}},
+            "total": {"duration": 3.0, "queries": 4},
+        }
+        with mock.patch.object(sink, "socket") as socket:
+            sink.emit(record)
+        lines = socket.sendto.call_args[0][0].decode().splitlines()
+        self.assertIn("test.example_views_BookListView.total.queries:4|g", lines)
+        self.assertIn("test.example_views_BookListView.render.queries:2|g", lines)
+        self.assertIn("test.example_views_BookListView.total.time:3.000|ms", lines)
@@ -0,0 +1,52 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django.test.utils import override_settings
+
+from utensils.middleware import HiddenSiteMiddleware
+
+
+@override_settings(
+    HIDDEN_SITE_SECRET="letmein", HIDDEN_SITE_ALLOWED_PATHS=["/static/", "/health"]
+)
+class HiddenSiteMiddlewareTest(SimpleTestCase):
+    def get(self, path, cookie=None):
+        request = RequestFactory().get(path)
+        if cookie is not None:
+            request.COOKIES[HiddenSiteMiddleware.COOKIE_NAME] = cookie
+        middleware = HiddenSiteMiddleware(lambda request: HttpResponse("OK"))
+        return middleware(request)
+
+    def test_blocked(self):
+        self.assertEqual(self.get("/books/").status_code, 403)
+        self.assertEqual(self.get("/books/?letmeout").status_code, 403)
+
+    def test_unlock(self):
+        response = self.get("/books/?letmein")
+        self.assertEqual(response.status_code, 200)
+        cookie = response.cookies[HiddenSiteMiddleware.COOKIE_NAME]
+        self.assertTrue(cookie["httponly"])
+        self.assertNotIn("letmein", cookie.value)
+        response = self.get("/books/", cookie=cookie.value)
+        self.assertEqual(response.status_code, 200)
+        # The cookie is only set when unlocking.
+        self.assertNotIn(HiddenSiteMiddleware.COOKIE_NAME, response.cookies)
+
+    def test_forged_cookie(self):
+        for cookie in ("1", "True", "letmein", ""):
+            self.assertEqual(self.get("/books/", cookie=cookie).status_code, 403)
+
+    def test_changed_secret(self):
+        cookie = self.get("/books/?letmein").cookies[HiddenSiteMiddleware.COOKIE_NAME]
+        with self.settings(HIDDEN_SITE_SECRET="new"):
+            response = self.get("/books/", cookie=cookie.value)
+        self.assertEqual(response.status_code, 403)
+
+    def test_allowed_paths(self):
+        self.assertEqual(self.get("/static/css/site.css").status_code, 200)
+        self.assertEqual(self.get("/health").status_code, 200)
+        self.assertEqual(self.get("/books/static/").status_code, 403)
+
+    @override_settings(HIDDEN_SITE_SECRET=None)
+    def test_no_secret(self):
+        self.assertEqual(self.get("/books/?None").status_code, 403)
+        self.assertEqual(self.get("/books/", cookie="").status_code, 403)
@@ -0,0 +1,45 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import models
+from django.test import TestCase
+
+from utensils.models import HashedTimeStampedModel
+
+
+class Receipt(HashedTimeStampedModel):
+    number = models.PositiveIntegerField()
+
+    class Meta:
+        app_label = "example"
+
+
+class HashedTimeStampedModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.receipts = [Receipt.objects.create(number=i) for i in range(5)]
+
+    def test_get_by_hash(self):
+        receipt = self.receipts[2]
+        self.assertEqual(len(receipt.stored_hash), 40)
+        with self.assertNumQueries(1):
+            self.assertEqual(Receipt.objects.get_by_hash(receipt.hash), receipt)
+
+    def test_get_by_hash_miss(self):
+        value = self.receipts[2].hash
+        # Right selector, wrong ending.
+        tampered = value[:-1] + ("0" if value[-1] != "0" else "1")
+        for value in (tampered, value[:20], "", "x" * 40):
+            with self.assertRaises(Receipt.DoesNotExist):
+                Receipt.objects.get_by_hash(value)
+
+    def test_backfill(self):
+        hashes = dict(Receipt.objects.values_list("pk", "stored_hash"))
+        Receipt.objects.filter(number__lt=2).update(stored_hash=None)
+        Receipt.objects.filter(number=2).update(stored_hash="")
+        out = StringIO()
+        call_command("backfill_hashes", "example.Receipt", batch_size=2, stdout=out)
+        self.assertIn("Backfilled 3 example.Receipt hashes.", out.getvalue())
+        self.assertEqual(dict(Receipt.objects.values_list("pk", "stored_hash")), hashes)
+        receipt = Receipt.objects.get(number=0)
+        self.assertEqual(Receipt.objects.get_by_hash(receipt.hash), receipt)
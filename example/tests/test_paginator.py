@@ -0,0 +1,104 @@
+import base64
+import datetime
+import json
+
+from django.test import TestCase
+from django.utils import timezone
+
+from countries_plus.models import Country
+
+from utensils.paginator import InvalidCursor, KeysetPaginator
+
+from example.models import Author, Book
+
+
+def walk(paginator):
+    """
+    Returns the primary keys of every row, paging forwards from the first
+    page and then backwards from the last.
+    """
+    # Stop rather than loop forever if a cursor doesn't move on.
+    max_pages = paginator.object_list.count() + 1
+    forwards = []
+    page = paginator.page()
+    for i in range(max_pages):
+        forwards.extend(obj.pk for obj in page)
+        if not page.has_next():
+            break
+        page = paginator.page(page.next_cursor)
+    backwards = [obj.pk for obj in page]
+    for i in range(max_pages):
+        if not page.has_previous():
+            break
+        page = paginator.page(page.previous_cursor)
+        backwards = [obj.pk for obj in page] + backwards
+    return forwards, backwards
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name="Ann", last_name="Smith")
+        Book.objects.bulk_create(
+            Book(author=author, title="Book {}".format(i), publication_date=1900)
+            for i in range(200)
+        )
+        # Timestamps closer together than a millisecond, some of them equal.
+        start = timezone.now()
+        for i, pk in enumerate(
+            Book.objects.order_by("pk").values_list("pk", flat=True)
+        ):
+            modified = start + datetime.timedelta(microseconds=(i // 3) * 250)
+            Book.objects.filter(pk=pk).update(modified=modified)
+
+    def assertPagesThrough(self, queryset, ordering, per_page=7):
+        expected = list(queryset.order_by(*ordering).values_list("pk", flat=True))
+        forwards, backwards = walk(KeysetPaginator(queryset, per_page, ordering))
+        self.assertEqual(forwards, expected)
+        self.assertEqual(backwards, expected)
+
+    def test_modified_ascending(self):
+        self.assertPagesThrough(Book.objects.all(), ["modified", "pk"])
+
+    def test_modified_descending(self):
+        self.assertPagesThrough(Book.objects.all(), ["-modified", "-pk"])
+
+    def test_nullable_foreign_key(self):
+        gb, created = Country.objects.get_or_create(
+            iso="GB",
+            defaults={"iso3": "GBR", "iso_numeric": 826, "name": "United Kingdom"},
+        )
+        fr, created = Country.objects.get_or_create(
+            iso="FR", defaults={"iso3": "FRA", "iso_numeric": 250, "name": "France"}
+        )
+        for i in range(30):
+            Author.objects.create(
+                first_name="Author",
+                last_name=str(i),
+                country=[None, gb, fr][i % 3],
+            )
+        for ordering in (["country", "pk"], ["-country", "-pk"]):
+            paginator = KeysetPaginator(Author.objects.all(), 4, ordering)
+            expected = list(
+                Author.objects.order_by(*paginator.ordering).values_list(
+                    "pk", flat=True
+                )
+            )
+            self.assertEqual(walk(paginator), (expected, expected))
+
+    def test_tampered_cursor(self):
+        paginator = KeysetPaginator(Book.objects.all(), 7, ["modified", "pk"])
+        cursor = paginator.page().next_cursor
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        for values in (
+            ["abc", 1],
+            [data["v"][0], "abc"],
+            [data["v"][0], [1, 2]],
+            [{"x": 1}, 1],
+            [{"dt": "2015-02-30T00:00:00"}, 1],
+        ):
+            tampered = base64.urlsafe_b64encode(
+                json.dumps(dict(data, v=values)).encode()
+            ).decode()
+            with self.assertRaises(InvalidCursor):
+                paginator.page(tampered)
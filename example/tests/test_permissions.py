@@ -0,0 +1,68 @@
+from django.contrib.auth.models import Permission, User
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.views.generic import View
+
+from utensils.viewmixins import PermissionRequiredMixin
+
+
+class BookView(PermissionRequiredMixin, View):
+    raise_exception = True
+
+    def get(self, request):
+        return HttpResponse("OK")
+
+
+class PermissionRequiredTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.editor = User.objects.create_user("editor")
+        cls.editor.user_permissions.add(
+            *Permission.objects.filter(codename__in=["add_book", "change_book"])
+        )
+        cls.reviewer = User.objects.create_user("reviewer")
+        cls.reviewer.user_permissions.add(
+            Permission.objects.get(codename="change_book")
+        )
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def allowed(self, user, permission_required, cache_permissions=False):
+        request = RequestFactory().get("/")
+        request.user = User.objects.get(pk=user.pk)
+        view = BookView.as_view(
+            permission_required=permission_required,
+            cache_permissions=cache_permissions,
+        )
+        try:
+            return view(request).status_code == 200
+        except PermissionDenied:
+            return False
+
+    def test_list(self):
+        perms = ["example.add_book", "example.change_book"]
+        for cache_permissions in (False, True):
+            self.assertTrue(self.allowed(self.editor, perms, cache_permissions))
+            self.assertFalse(self.allowed(self.reviewer, perms, cache_permissions))
+
+    def test_dict(self):
+        perms = {
+            "all": ["example.change_book"],
+            "any": ["example.add_book", "example.delete_book"],
+        }
+        for cache_permissions in (False, True):
+            self.assertTrue(self.allowed(self.editor, perms, cache_permissions))
+            self.assertFalse(self.allowed(self.reviewer, perms, cache_permissions))
+        perms = {"any": ["example.add_book", "example.change_book"]}
+        self.assertTrue(self.allowed(self.reviewer, perms))
+
+    def test_empty(self):
+        for perms in ([], (), {}, {"all": [], "any": []}):
+            with self.assertRaises(ImproperlyConfigured):
+                self.allowed(self.reviewer, perms)
+
+    def test_skipped(self):
+        self.assertTrue(self.allowed(self.reviewer, False))
@@ -0,0 +1,73 @@
+import sqlite3
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from utensils.search import SQLiteFTS5SearchBackend
+
+from example.models import Author, Book
+
+
+def has_fts5():
+    # Checked in memory, the test database doesn't exist yet.
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(a)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+@skipUnless(connection.vendor == "sqlite" and has_fts5(), "SQLite FTS5 isn't available")
+class SQLiteFTS5SearchBackendTest(TestCase):
+    backend = SQLiteFTS5SearchBackend("example_book_fts")
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name="Ann", last_name="Smith")
+        for title in ["The Silent Garden", "The River Garden", "Gardening Weekly"]:
+            Book.objects.create(author=author, title=title, publication_date=1950)
+        # The table and triggers are rolled back with the test data.
+        with connection.cursor() as cursor:
+            for statement in cls.backend.create_table_sql(Book, ["title"]):
+                cursor.execute(statement)
+
+    def search(self, term):
+        queryset = self.backend.filter(
+            Book.objects.order_by("title"), {"title": "icontains"}, term
+        )
+        return list(queryset.values_list("title", flat=True))
+
+    def test_match(self):
+        self.assertEqual(self.search("river"), ["The River Garden"])
+        self.assertEqual(self.search("garden silent"), ["The Silent Garden"])
+        self.assertEqual(self.search("orchard"), [])
+
+    def test_prefix(self):
+        self.assertEqual(
+            self.search("gard"),
+            ["Gardening Weekly", "The River Garden", "The Silent Garden"],
+        )
+
+    def test_empty_term(self):
+        self.assertEqual(len(self.search("  ")), 3)
+
+    def test_query_syntax_is_literal(self):
+        # Unquoted these would be an OR, a column filter and syntax errors.
+        self.assertEqual(self.search("river OR silent"), [])
+        self.assertEqual(self.search("title:river"), [])
+        self.assertEqual(self.search('"river'), ["The River Garden"])
+        self.assertEqual(self.search("(river*"), ["The River Garden"])
+
+    def test_triggers(self):
+        book = Book.objects.get(title="The River Garden")
+        book.title = "The Winter Orchard"
+        book.save()
+        self.assertEqual(self.search("river"), [])
+        self.assertEqual(self.search("orchard"), ["The Winter Orchard"])
+        book.delete()
+        self.assertEqual(self.search("orchard"), [])
+        Book.objects.create(
+            author=book.author, title="Orchard Road", publication_date=1960
+        )
+        self.assertEqual(self.search("orchard"), ["Orchard Road"])
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+
+from utensils import storage
+from utensils.management.commands.collectstatic import Command
+from utensils.storage import SharedS3BotoStorage
+
+
+class FakeKey:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = self.key = name
+        self.etag = None
+        self.size = 0
+
+    def set_metadata(self, name, value):
+        pass
+
+    def set_contents_from_file(self, content, **kwargs):
+        if self.name in self.bucket.broken:
+            raise IOError("Upload of {} failed.".format(self.name))
+        data = content.read()
+        self.etag = '"{}"'.format(hashlib.md5(data).hexdigest())
+        self.size = len(data)
+        with self.bucket.lock:
+            self.bucket.keys[self.name] = self
+            self.bucket.uploads.append(self.name)
+
+    def exists(self):
+        return self.name in self.bucket.keys
+
+
+class FakeBucket:
+    def __init__(self, name):
+        self.name = name
+        self.keys = {}
+        self.uploads = []
+        self.broken = set()
+        self.lock = threading.Lock()
+
+    def get_key(self, name):
+        return self.keys.get(name)
+
+    def new_key(self, name):
+        return FakeKey(self, name)
+
+    def list(self, prefix=""):
+        return [key for name, key in self.keys.items() if name.startswith(prefix)]
+
+    def delete_key(self, name):
+        self.keys.pop(name, None)
+
+
+class FakeS3Connection:
+    """
+    Stands in for boto's S3Connection, keeping the files in memory.
+    """
+
+    instances = []
+    buckets = {}
+
+    def __init__(self, access_key, secret_key, calling_format=None):
+        self.instances.append(self)
+
+    def get_bucket(self, name, validate=True):
+        return self.buckets.setdefault(name, FakeBucket(name))
+
+
+class FakeS3Storage(SharedS3BotoStorage):
+    connection_class = FakeS3Connection
+    access_key = "access"
+    secret_key = "secret"
+    bucket_name = "bucket"
+    location = "static"
+
+
+class StorageTestCase(SimpleTestCase):
+    def setUp(self):
+        FakeS3Connection.instances = []
+        FakeS3Connection.buckets = {}
+        patcher = mock.patch.multiple(storage, _connections={}, _buckets={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class SharedS3BotoStorageTest(StorageTestCase):
+    def test_shared_connection(self):
+        first, second = FakeS3Storage(), FakeS3Storage()
+        self.assertIs(first.connection, second.connection)
+        self.assertIs(first.bucket, second.bucket)
+        self.assertEqual(len(FakeS3Connection.instances), 1)
+        other = FakeS3Storage(access_key="other")
+        self.assertIsNot(other.connection, first.connection)
+
+    def test_etag_matches(self):
+        s3 = FakeS3Storage()
+        local = tempfile.NamedTemporaryFile(delete=False)
+        self.addCleanup(os.remove, local.name)
+        local.write(b"body { color: red }")
+        local.close()
+        self.assertFalse(s3.etag_matches("site.css", local.name))
+        with open(local.name, "rb") as f:
+            s3.save("site.css", f)
+        self.assertTrue(s3.etag_matches("site.css", local.name))
+        with open(local.name, "wb") as f:
+            f.write(b"body { color: blue }")
+        self.assertFalse(s3.etag_matches("site.css", local.name))
+
+
+class ParallelCollectStaticTest(StorageTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_dir)
+        os.mkdir(os.path.join(self.static_dir, "css"))
+        self.names = ["css/site{}.css".format(i) for i in range(25)]
+        for name in self.names:
+            with open(os.path.join(self.static_dir, name), "w") as f:
+                f.write("/* {} */".format(name))
+        settings = override_settings(
+            STATICFILES_DIRS=[self.static_dir],
+            STATICFILES_FINDERS=["django.contrib.staticfiles.finders.FileSystemFinder"],
+            STATICFILES_STORAGE="example.tests.test_storage.FakeS3Storage",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def collectstatic(self):
+        # The staticfiles command is found first by call_command().
+        command = Command()
+        parser = command.create_parser("manage.py", "collectstatic")
+        options = parser.parse_args(["--noinput", "--verbosity=0", "--workers=4"])
+        command.execute(**vars(options))
+        return FakeS3Connection.buckets["bucket"]
+
+    def test_uploads_every_file(self):
+        bucket = self.collectstatic()
+        expected = sorted("static/" + name for name in self.names)
+        self.assertEqual(sorted(bucket.uploads), expected)
+        self.assertEqual(sorted(bucket.keys), expected)
+        self.assertEqual(len(FakeS3Connection.instances), 1)
+
+        # Unchanged files aren't uploaded again.
+        bucket.uploads = []
+        with open(os.path.join(self.static_dir, self.names[0]), "w") as f:
+            f.write("/* changed */")
+        self.collectstatic()
+        self.assertEqual(bucket.uploads, ["static/" + self.names[0]])
+
+    def test_reports_errors(self):
+        bucket = FakeS3Connection.buckets["bucket"] = FakeBucket("bucket")
+        bucket.broken.add("static/css/site7.css")
+        with self.assertRaisesRegex(IOError, "site7.css failed"):
+            self.collectstatic()
@@ -0,0 +1,100 @@
+import datetime
+from unittest import skipIf
+
+from django.test import SimpleTestCase
+
+from utensils.utils import (
+    MonthRange,
+    last_day_of_month,
+    last_day_of_month_array,
+    num_months_between,
+    num_months_between_array,
+    np,
+    to_unix_timestamp,
+    to_unix_timestamp_array,
+)
+
+
+DATETIMES = [
+    datetime.datetime(1969, 12, 31, 23, 59, 59, 500000),
+    datetime.datetime(1969, 12, 31, 23, 59, 58, 1),
+    datetime.datetime(1900, 2, 28, 12, 30, 15, 999999),
+    datetime.datetime(1970, 1, 1),
+    datetime.datetime(1970, 1, 1, 0, 0, 0, 999999),
+    datetime.datetime(2016, 2, 29, 23, 59, 59, 250000),
+]
+
+
+@skipIf(np is None, "NumPy isn't installed.")
+class BatchDateTest(SimpleTestCase):
+    """
+    The batch helpers give the same results as the scalar ones.
+    """
+
+    def test_to_unix_timestamp_array(self):
+        self.assertEqual(
+            list(to_unix_timestamp_array(DATETIMES)),
+            [to_unix_timestamp(dt) for dt in DATETIMES],
+        )
+        epoch = datetime.datetime(2000, 1, 1, 0, 0, 0, 500000)
+        self.assertEqual(
+            list(to_unix_timestamp_array(DATETIMES, epoch)),
+            [to_unix_timestamp(dt, epoch) for dt in DATETIMES],
+        )
+
+    def test_iterables(self):
+        self.assertEqual(
+            list(to_unix_timestamp_array(dt for dt in DATETIMES)),
+            [to_unix_timestamp(dt) for dt in DATETIMES],
+        )
+        self.assertEqual(
+            list(last_day_of_month_array(dt for dt in DATETIMES)),
+            [last_day_of_month(dt.year, dt.month) for dt in DATETIMES],
+        )
+
+    def test_months(self):
+        end = datetime.date(2016, 3, 1)
+        self.assertEqual(
+            list(num_months_between_array(DATETIMES, [end] * len(DATETIMES))),
+            [num_months_between(dt, end) for dt in DATETIMES],
+        )
+
+
+class MonthRangeTest(SimpleTestCase):
+    def test_index(self):
+        months = MonthRange(datetime.date(2015, 1, 1), datetime.date(2015, 12, 1))
+        self.assertEqual(months.index(datetime.date(2015, 1, 31)), 0)
+        self.assertEqual(months.index(datetime.datetime(2015, 12, 31, 23, 59)), 11)
+        for value in (datetime.date(2014, 12, 31), datetime.date(2016, 1, 1)):
+            with self.assertRaises(ValueError):
+                months.index(value)
+
+    def test_index_with_step(self):
+        quarters = MonthRange(
+            datetime.date(2015, 1, 1), datetime.date(2015, 11, 1), step=3
+        )
+        self.assertEqual(len(quarters), 4)
+        positions = [
+            quarters.index(datetime.date(2015, month, 15)) for month in range(1, 12)
+        ]
+        self.assertEqual(positions, [0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3])
+        for value in (datetime.date(2014, 12, 31), datetime.date(2015, 12, 1)):
+            with self.assertRaises(ValueError):
+                quarters.index(value)
+
+    def test_contains_with_step(self):
+        quarters = MonthRange(
+            datetime.date(2015, 1, 1), datetime.date(2015, 11, 1), step=3
+        )
+        for month in range(1, 12):
+            value = datetime.date(2015, month, 15)
+            self.assertIn(value, quarters)
+            quarters.index(value)
+        self.assertNotIn(datetime.date(2014, 12, 31), quarters)
+        self.assertNotIn(datetime.date(2015, 12, 1), quarters)
+        backwards = MonthRange(
+            datetime.date(2015, 12, 1), datetime.date(2015, 1, 1), step=-2
+        )
+        self.assertIn(datetime.date(2015, 11, 1), backwards)
+        self.assertEqual(backwards.index(datetime.date(2015, 11, 1)), 0)
+        self.assertNotIn(datetime.date(2016, 1, 1), backwards)
@@ -0,0 +1,212 @@
+import json
+
+from django.conf.urls import url
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.views.generic import ListView
+
+from utensils.viewmixins import (
+    ExportMixin,
+    OrderByMixin,
+    PaginateMixin,
+    RelatedFieldsMixin,
+)
+from utensils.views import AutocompleteView
+
+from example.models import Author, Book
+from example.views import BookListView
+
+
+class BookListTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        smith = Author.objects.create(first_name="Ann", last_name="Smith")
+        jones = Author.objects.create(first_name="Bob", last_name="Jones")
+        for i in range(45):
+            Book.objects.create(
+                author=smith if i % 2 else jones,
+                title="Book {:02d}".format(i),
+                publication_date=1900 + i,
+                in_stock=bool(i % 3),
+            )
+
+
+class ConditionalListTest(BookListTestCase):
+    def test_page_counts_once(self):
+        # The aggregate's count is reused by the paginator.
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/books/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertEqual(len(queries), 4)
+        self.assertFalse(any("COUNT(*)" in q["sql"] for q in queries))
+
+    def test_not_modified(self):
+        etag = self.client.get("/books/")["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get("/books/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_changed(self):
+        etag = self.client.get("/books/")["ETag"]
+        Book.objects.first().delete()
+        response = self.client.get("/books/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_fragment(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/books/", HTTP_X_PJAX="true")
+        self.assertNotIn(b"<html", response.content)
+        self.assertIn(b"Book 00", response.content)
+
+
+class KeysetBookListView(BookListView):
+    paginate_keyset = True
+
+
+urlpatterns = [
+    url(r"^books/$", BookListView.as_view(), name="book_list"),
+    url(r"^keyset/$", KeysetBookListView.as_view(), name="keyset_book_list"),
+    url(r"^books/(?P<pk>\d+)/edit/$", BookListView.as_view(), name="book_edit"),
+    url(
+        r"^books/(?P<pk>\d+)/toggle-in-stock/$",
+        BookListView.as_view(),
+        name="book_toggle_in_stock",
+    ),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ListQueryCountTest(BookListTestCase):
+    """
+    The number of queries for each kind of list page, which shouldn't grow
+    with the number of rows shown.
+    """
+
+    def assertQueries(self, num, path):
+        with self.assertNumQueries(num):
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list(self):
+        self.assertQueries(4, "/books/?per-page=20")
+        self.assertQueries(4, "/books/?per-page=50")
+
+    def test_search(self):
+        # Plus checking the search found something.
+        self.assertQueries(5, "/books/?search=Smith")
+
+    def test_sort(self):
+        self.assertQueries(4, "/books/?sort-col=author&sort-dir=desc")
+
+    def test_deep_page(self):
+        self.assertQueries(4, "/books/?page=3")
+
+    def test_keyset_page(self):
+        response = self.assertQueries(4, "/keyset/")
+        cursor = response.context["page_obj"].next_cursor
+        self.assertQueries(4, "/keyset/?cursor={}".format(cursor))
+
+
+class AutocompleteTest(BookListTestCase):
+    def get_titles(self, **initkwargs):
+        view = AutocompleteView.as_view(
+            list_view=BookListView, fields=["title"], **initkwargs
+        )
+        response = view(RequestFactory().get("/", {"term": "book 0"}))
+        return [
+            result["title"]
+            for result in json.loads(response.content.decode())["results"]
+        ]
+
+    def test_cache_key(self):
+        # Every view made from AutocompleteView shares its cache.
+        self.assertEqual(len(self.get_titles()), 10)
+        self.assertEqual(self.get_titles(search_fields=["author__last_name"]), [])
+        self.assertEqual(self.get_titles(lookup="iexact"), [])
+        self.assertEqual(
+            self.get_titles(queryset=Book.objects.filter(in_stock=False)),
+            ["Book 00", "Book 03", "Book 06", "Book 09"],
+        )
+
+
+class InStockBooksMixin:
+    # Views often only provide get_queryset(), without a model or queryset.
+    def get_queryset(self):
+        return Book.objects.filter(in_stock=True)
+
+
+class InStockBookListView(
+    PaginateMixin,
+    OrderByMixin,
+    ExportMixin,
+    RelatedFieldsMixin,
+    InStockBooksMixin,
+    ListView,
+):
+    search_fields = {"author__last_name": "icontains"}
+    export_fields = ["title", ("author", "author__last_name")]
+
+
+class AuthorListView(RelatedFieldsMixin, ListView):
+    model = Author
+    list_fields = ["last_name", "book__title"]
+
+
+class OwnQuerysetTest(BookListTestCase):
+    def get_view(self, path):
+        request = RequestFactory().get(path)
+        return InStockBookListView(request=request, args=(), kwargs={})
+
+    def test_ordering(self):
+        view = self.get_view("/?sort-col=title&sort-dir=desc")
+        self.assertEqual(view.get_keyset_ordering(), ["-title", "-pk"])
+        titles = list(view.get_queryset().values_list("title", flat=True))
+        self.assertEqual(
+            titles,
+            list(
+                Book.objects.filter(in_stock=True)
+                .order_by("-title")
+                .values_list("title", flat=True)
+            ),
+        )
+
+    def test_related_fields(self):
+        view = self.get_view("/?sort-col=author&sort-dir=asc")
+        with self.assertNumQueries(1):
+            books = list(view.get_queryset())
+            self.assertEqual(len({book.author.last_name for book in books}), 2)
+
+    def test_export(self):
+        view = self.get_view("/?export=csv&sort-col=title&sort-dir=asc")
+        response = view.get(view.request)
+        self.assertIn('filename="book.csv"', response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], "title,author")
+        self.assertEqual(len(lines), 1 + Book.objects.filter(in_stock=True).count())
+
+
+class RelatedFieldsTest(BookListTestCase):
+    def test_reverse_foreign_key(self):
+        request = RequestFactory().get("/")
+        view = AuthorListView(request=request, args=(), kwargs={})
+        with self.assertNumQueries(2):
+            authors = list(view.get_queryset().order_by("last_name"))
+            counts = [len(author.book_set.all()) for author in authors]
+        self.assertEqual(counts, [23, 22])
+
+
+class MultiValuedSearchTest(BookListTestCase):
+    def test_no_duplicates(self):
+        # Both authors have several books matching, e.g. "Book 00" and "Book 01".
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/authors/?search=book 0")
+        self.assertEqual(response.status_code, 200)
+        names = [author.last_name for author in response.context["object_list"]]
+        self.assertEqual(names, ["Jones", "Smith"])
+        self.assertEqual(response.context["paginator"].count, 2)
+        sql = [q["sql"] for q in queries]
+        self.assertFalse(any("DISTINCT" in q for q in sql))
+        self.assertTrue(any("IN (SELECT" in q for q in sql))
@@ -1,6 +1,8 @@
 from django.conf.urls import patterns, include, url
 from django.views.generic.base import RedirectView
 
+from utensils.views import AutocompleteView
+
 from django.contrib import admin
 
 admin.autodiscover()
@@ -13,6 +15,14 @@ urlpatterns = patterns(
     url(r"^admin/", include(admin.site.urls)),
     url(r"^$", RedirectView.as_view(url="/books/")),
     url(r"^books/$", views.BookListView.as_view(), name="book_list"),
+    url(
+        r"^books/autocomplete/$",
+        AutocompleteView.as_view(
+            list_view=views.BookListView, fields=["pk", "title", "author__last_name"]
+        ),
+        name="book_autocomplete",
+    ),
+    url(r"^authors/$", views.AuthorListView.as_view(), name="author_list"),
     url(r"^books/(?P<pk>\d+)/edit/$", views.BookUpdateView.as_view(), name="book_edit"),
     url(
         r"^books/(?P<pk>\d+)/toggle-in-stock/$",
@@ -1,6 +1,7 @@
 from django.core.urlresolvers import reverse_lazy
 from django.views.generic import TemplateView, UpdateView
 
+from utensils.facets import BooleanFacet, RangeFacet, RelatedFacet
 from utensils.views import BaseListView, SetModelFieldView
 from utensils.viewmixins import MessageMixin, PermissionRequiredMixin
 
@@ -10,6 +11,8 @@ from .models import Author, Book
 
 class BookListView(BaseListView):
     model = Book
+    # Used by PjaxMixin:
+    conditional_get = True
     # Used by SearchFormMixin:
     search_fields = {
         "title": "icontains",
@@ -17,6 +20,39 @@ class BookListView(BaseListView):
         "author__middle_names": "icontains",
         "author__last_name": "icontains",
     }
+    # Used by OrderByMixin:
+    orderable_fields = {
+        "title": "title",
+        "author": ["author__last_name", "author__first_name"],
+    }
+    # Used by RelatedFieldsMixin:
+    list_fields = ["title", "author__last_name", "author__first_name", "in_stock"]
+    # Used by FacetMixin:
+    facets = [
+        BooleanFacet("in_stock"),
+        RangeFacet("publication_date", [(None, 1920), (1920, 1940), (1940, None)]),
+        RelatedFacet("author"),
+    ]
+    # Used by ExportMixin:
+    export_fields = [
+        "title",
+        ("author", "author__last_name"),
+        "publication_date",
+        "in_stock",
+    ]
+
+
+class AuthorListView(BaseListView):
+    model = Author
+    # Searching the authors' books, a reverse foreign key, doesn't repeat
+    # authors with several matching books.
+    search_fields = {
+        "first_name": "icontains",
+        "last_name": "icontains",
+        "book__title": "icontains",
+    }
+    orderable_fields = {"name": ["last_name", "first_name"]}
+    list_fields = ["last_name", "first_name"]
 
 
 class ToggleNotInStockView(SetModelFieldView):
@@ -1 +1,3 @@
 __version__ = 0.2
+
+default_app_config = "utensils.apps.UtensilsConfig"
@@ -0,0 +1,38 @@
+from django.apps import AppConfig, apps
+from django.core import checks
+from django.db.models.signals import m2m_changed
+
+
+class UtensilsConfig(AppConfig):
+    name = "utensils"
+    verbose_name = "Utensils"
+
+    def ready(self):
+        from .cache import invalidate_permissions, register_list_models
+        from .checks import check_sort_indexes
+
+        checks.register(check_sort_indexes)
+
+        if apps.is_installed("django.contrib.auth"):
+            from django.contrib.auth import get_user_model
+            from django.contrib.auth.models import Group, Permission
+
+            # Cached permissions (see cache.get_cached_permissions) depend on
+            # these as well as the relations below.
+            register_list_models([Permission, Group])
+
+            # Custom user models may not have groups or user_permissions.
+            User = get_user_model()
+            relations = [Group.permissions] + [
+                getattr(User, name)
+                for name in ("groups", "user_permissions")
+                if hasattr(User, name)
+            ]
+            for relation in relations:
+                m2m_changed.connect(
+                    invalidate_permissions,
+                    sender=relation.through,
+                    dispatch_uid="utensils_permissions_{}".format(
+                        relation.through._meta.db_table
+                    ),
+                )
@@ -0,0 +1,166 @@
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+
+
+"""
+Generation counters used to invalidate cached lists (see
+`viewmixins.CachedListMixin`) and permissions (see
+`viewmixins.PermissionRequiredMixin`) without having to find and delete
+keys.
+
+Each model has a counter in the cache which is part of every key built for
+its lists. Saving or deleting an instance bumps the counter, so the old
+entries are simply never read again and expire on their own. Only models
+registered by a cached list (see `register_list_models`) are watched.
+"""
+
+GENERATION_KEY = "utensils-list-generation:{}.{}"
+PERMISSIONS_KEY = "utensils-permissions:{}:{}"
+
+logger = logging.getLogger("utensils.cache")
+
+# The cache aliases holding generations for each registered model.
+_list_cache_aliases = {}
+_registry_lock = threading.Lock()
+
+
+def _generation_key(model):
+    opts = model._meta
+    return GENERATION_KEY.format(opts.app_label, opts.model_name)
+
+
+def get_generations(models, cache_alias="default"):
+    """
+    Returns a list of the current generation for each model.
+    """
+    cache = caches[cache_alias]
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Start from the current time rather than 1 so a counter that
+            # has been evicted can't reuse an old generation.
+            cache.add(key, int(time.time() * 1000), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def register_list_models(models, cache_alias="default"):
+    """
+    Watches the models for saves and deletes, bumping their generations in
+    the cache alias the list reads them from. Called by CachedListMixin.
+    """
+    with _registry_lock:
+        for model in models:
+            aliases = _list_cache_aliases.setdefault(model, set())
+            if cache_alias in aliases:
+                continue
+            aliases.add(cache_alias)
+            uid = "utensils_list_cache_{}".format(_generation_key(model))
+            post_save.connect(invalidate_on_change, sender=model, dispatch_uid=uid)
+            post_delete.connect(invalidate_on_change, sender=model, dispatch_uid=uid)
+
+
+def invalidate_list_cache(model, cache_alias=None):
+    """
+    Bumps the model's generation so all its cached lists are ignored, in
+    `cache_alias` or by default in every alias its lists use.
+    Call this after changes that don't send signals, e.g. queryset.update().
+    """
+    if cache_alias is None:
+        aliases = _list_cache_aliases.get(model, set()) | {"default"}
+    else:
+        aliases = [cache_alias]
+    key = _generation_key(model)
+    for alias in aliases:
+        cache = caches[alias]
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+
+
+def invalidate_on_change(sender, **kwargs):
+    """
+    post_save and post_delete receiver for the registered models.
+    """
+    # A cache outage shouldn't stop the save.
+    try:
+        invalidate_list_cache(sender)
+    except Exception:
+        logger.exception("Could not invalidate the cached lists of %s.", sender)
+
+
+def get_cached_permissions(user, timeout=300, cache_alias="default"):
+    """
+    Returns the set of permission names for the user (as
+    user.get_all_permissions()), cached between requests. The key includes
+    the generations of Permission and Group so changes to either, or to who
+    has them, invalidate it.
+    """
+    from django.contrib.auth.models import Group, Permission
+
+    cache = caches[cache_alias]
+    generations = get_generations([Permission, Group], cache_alias)
+    key = PERMISSIONS_KEY.format(user.pk, ".".join(str(g) for g in generations))
+    permissions = cache.get(key)
+    if permissions is None:
+        permissions = user.get_all_permissions()
+        cache.set(key, permissions, timeout)
+    return permissions
+
+
+def invalidate_permissions(sender, **kwargs):
+    """
+    m2m_changed receiver for the user/group permission and group membership
+    relations, connected in UtensilsConfig.ready().
+    """
+    from django.contrib.auth.models import Permission
+
+    if kwargs.get("action", "").startswith("post_"):
+        try:
+            invalidate_list_cache(Permission)
+        except Exception:
+            logger.exception("Could not invalidate the cached permissions.")
+
+
+class LRUCache:
+    """
+    A small in-process cache keeping the `maxsize` most recently used entries
+    for up to `timeout` seconds, for hot lookups where even a round trip to
+    the cache server is too slow. Entries aren't invalidated by changes.
+    """
+
+    def __init__(self, maxsize=1000, timeout=30):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            try:
+                expires, value = self.entries[key]
+            except KeyError:
+                return default
+            if expires < time.monotonic():
+                del self.entries[key]
+                return default
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
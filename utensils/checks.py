@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.core.urlresolvers import get_resolver
+
+
+"""
+Optional system checks, enabled with UTENSILS_CHECK_SORT_INDEXES = True.
+"""
+
+
+def _subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for subclass in _subclasses(subclass):
+            yield subclass
+
+
+def _resolve_field(model, path):
+    """
+    Returns the field at the end of a lookup path such as
+    'author__last_name', or None if it can't be found.
+    """
+    names = path.lstrip("-").split("__")
+    for name in names[:-1]:
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.is_relation:
+            return None
+        model = field.related_model
+    if names[-1] == "pk":
+        return model._meta.pk
+    try:
+        return model._meta.get_field(names[-1])
+    except FieldDoesNotExist:
+        return None
+
+
+def is_indexed(field):
+    """
+    Returns True if the field is the first column of an index on its model.
+    """
+    if field.primary_key or field.unique or field.db_index:
+        return True
+    opts = field.model._meta
+    together = list(opts.index_together) + list(opts.unique_together)
+    indexes = getattr(opts, "indexes", [])
+    together += [index.fields for index in indexes]
+    return any(fields and fields[0] == field.name for fields in together)
+
+
+def check_sort_indexes(app_configs=None, **kwargs):
+    """
+    Warns about sort columns allowed by an OrderByMixin view's
+    `orderable_fields` that have no database index to support them.
+    """
+    from .viewmixins import OrderByMixin
+
+    if not getattr(settings, "UTENSILS_CHECK_SORT_INDEXES", False):
+        return []
+
+    # Make sure the views have been imported.
+    get_resolver(None).url_patterns
+
+    errors = []
+    for view in _subclasses(OrderByMixin):
+        model = getattr(view, "model", None)
+        if model is None and getattr(view, "queryset", None) is not None:
+            model = view.queryset.model
+        if model is None or view.orderable_fields is None:
+            continue
+        if app_configs is not None and model._meta.app_config not in app_configs:
+            continue
+
+        for sort_col, fields in view().get_orderable_fields().items():
+            field = _resolve_field(model, fields[0])
+            if field is None:
+                errors.append(
+                    checks.Error(
+                        "Sort column '{}' refers to the unknown field '{}'.".format(
+                            sort_col, fields[0]
+                        ),
+                        obj=view,
+                        id="utensils.E001",
+                    )
+                )
+            elif not is_indexed(field):
+                errors.append(
+                    checks.Warning(
+                        "Sort column '{}' orders by '{}' which has no "
+                        "database index.".format(sort_col, fields[0]),
+                        hint="Add db_index=True or an index_together entry on "
+                        "{}.{}.".format(
+                            field.model._meta.app_label, field.model.__name__
+                        ),
+                        obj=view,
+                        id="utensils.W001",
+                    )
+                )
+    return errors
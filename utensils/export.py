@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .paginator import KeysetPaginator
+
+
+"""
+Streams a queryset as CSV or newline delimited JSON, used by
+`viewmixins.ExportMixin`.
+
+Rows are read with values_list() in chunks, each seeking past the last row
+of the one before (see `paginator.KeysetPaginator`), so neither Django nor
+the database driver ever holds more than one chunk in memory however many
+rows are exported.
+"""
+
+
+def export_rows(queryset, fields, ordering, chunk_size=2000):
+    """
+    Yields a tuple of the `fields` values for every row of the queryset in
+    the order given by `ordering`, whose last field must be unique.
+    """
+    paginator = KeysetPaginator(queryset, chunk_size, ordering)
+    ordering = paginator.ordering
+    columns = list(fields) + [field.lstrip("-") for field in ordering]
+    qs = queryset.prefetch_related(None).order_by(*ordering)
+    values = None
+    while True:
+        chunk = qs
+        if values is not None:
+            chunk = chunk.filter(paginator.seek_filter(ordering, values))
+        rows = list(chunk.values_list(*columns)[:chunk_size])
+        for row in rows:
+            yield row[: len(fields)]
+        if len(rows) < chunk_size:
+            return
+        values = list(rows[-1][len(fields) :])
+
+
+class Echo:
+    """
+    File-like object that returns what is written to it, so csv.writer can
+    build a line at a time for a StreamingHttpResponse.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(headers, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(headers, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(headers, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", csv_lines),
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+}
@@ -0,0 +1,187 @@
+from functools import reduce
+import operator
+
+from django.core.exceptions import ValidationError
+from django.db.models import Case, IntegerField, Q, Sum, Value, When
+from django.utils.text import capfirst
+
+from .checks import _resolve_field
+
+
+"""
+Facets used by `viewmixins.FacetMixin` to filter a list and count how many
+rows each choice would give.
+
+A facet is chosen with a query string parameter (by default the field
+name) and offers a list of options, each with a value, a label and the Q
+object that filters for it:
+
+  class BookListView(BaseListView):
+      model = Book
+      facets = [
+          BooleanFacet("in_stock"),
+          RangeFacet("publication_date", [(None, 1920), (1920, 1940), (1940, None)]),
+          RelatedFacet("author"),
+      ]
+"""
+
+
+class BaseFacet:
+    def __init__(self, field, label=None, param=None):
+        self.field = field
+        self.label = label
+        self.param = param or field
+
+    def get_label(self, model):
+        if self.label is None:
+            field = _resolve_field(model, self.field)
+            return capfirst(field.verbose_name) if field else self.field
+        return self.label
+
+    def get_options(self, queryset):
+        """
+        Returns a list of (value, label, Q) tuples for the queryset.
+        """
+        raise NotImplementedError(
+            "Subclasses of BaseFacet must provide a get_options() method."
+        )
+
+    def get_filter(self, queryset, value):
+        """
+        Returns the Q object for the option with the given value from the
+        query string, or None if there isn't one.
+        """
+        for option_value, label, q in self.get_options(queryset):
+            if option_value == value:
+                return q
+
+
+class ChoiceFacet(BaseFacet):
+    """
+    One option for each of `choices`, by default the field's choices.
+    """
+
+    def __init__(self, field, choices=None, **kwargs):
+        super().__init__(field, **kwargs)
+        self.choices = choices
+
+    def get_options(self, queryset):
+        choices = self.choices
+        if choices is None:
+            choices = _resolve_field(queryset.model, self.field).flatchoices
+        return [
+            (str(value), label, Q(**{self.field: value})) for value, label in choices
+        ]
+
+
+class BooleanFacet(BaseFacet):
+    def __init__(self, field, labels=("Yes", "No"), **kwargs):
+        super().__init__(field, **kwargs)
+        self.labels = labels
+
+    def get_options(self, queryset):
+        return [
+            ("1", self.labels[0], Q(**{self.field: True})),
+            ("0", self.labels[1], Q(**{self.field: False})),
+        ]
+
+
+class RangeFacet(BaseFacet):
+    """
+    One option for each (low, high) range, including low and excluding high.
+    Either can be None for an open ended range.
+    """
+
+    def __init__(self, field, ranges, **kwargs):
+        super().__init__(field, **kwargs)
+        self.ranges = ranges
+
+    def get_options(self, queryset):
+        options = []
+        for low, high in self.ranges:
+            q = Q()
+            if low is not None:
+                q &= Q(**{self.field + "__gte": low})
+            if high is not None:
+                q &= Q(**{self.field + "__lt": high})
+            if low is None:
+                label = "Before {}".format(high)
+            elif high is None:
+                label = "{} and after".format(low)
+            else:
+                label = "{} to {}".format(low, high)
+            value = "{}-{}".format(
+                "" if low is None else low, "" if high is None else high
+            )
+            options.append((value, label, q))
+        return options
+
+
+class RelatedFacet(BaseFacet):
+    """
+    One option for each related object used by the list, e.g. the authors of
+    a list of books. This needs a query to find them, as well as the counts.
+    `queryset` limits the related objects offered.
+    """
+
+    def __init__(self, field, queryset=None, **kwargs):
+        super().__init__(field, **kwargs)
+        self.queryset = queryset
+
+    def get_related_queryset(self, queryset):
+        if self.queryset is not None:
+            return self.queryset.all()
+        field = _resolve_field(queryset.model, self.field)
+        return field.related_model._default_manager.all()
+
+    def get_options(self, queryset):
+        related = self.get_related_queryset(queryset).filter(
+            pk__in=queryset.order_by().values(self.field)
+        )
+        return [(str(obj.pk), str(obj), Q(**{self.field: obj.pk})) for obj in related]
+
+    def get_filter(self, queryset, value):
+        # Check the value without loading every option.
+        related = self.get_related_queryset(queryset)
+        try:
+            pk = related.model._meta.pk.to_python(value)
+        except ValidationError:
+            return None
+        return Q(**{self.field: pk})
+
+
+def facet_counts(queryset, facets, active):
+    """
+    Returns a list of (facet, options) where options is a list of (value,
+    label, count) for each facet, counted with a single aggregate query.
+
+    `active` maps the param of each chosen facet to its Q object. The count
+    for an option includes the choices made in the other facets (but not its
+    own), so it's the number of rows there would be after choosing it.
+    """
+    annotations = {}
+    results = []
+    for i, facet in enumerate(facets):
+        others = [q for param, q in active.items() if param != facet.param]
+        options = facet.get_options(queryset)
+        for j, (value, label, q) in enumerate(options):
+            annotations["facet_{}_{}".format(i, j)] = Sum(
+                Case(
+                    When(reduce(operator.and_, others, q), then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            )
+        results.append((facet, options))
+
+    counts = queryset.order_by().aggregate(**annotations) if annotations else {}
+    return [
+        (
+            facet,
+            [
+                (value, label, counts["facet_{}_{}".format(i, j)] or 0)
+                for j, (value, label, q) in enumerate(options)
+            ],
+        )
+        for i, (facet, options) in enumerate(results)
+    ]
@@ -1,6 +1,11 @@
+from functools import reduce
+import operator
+
 from django import forms
+from django.db import models
+from django.db.models import Case, IntegerField, Max, Q, Value, When
+from django.db.models.functions import Lower
 from django.utils.translation import ugettext_lazy as _
-from django.utils.functional import curry
 
 
 class SearchForm(forms.Form):
@@ -13,6 +18,33 @@ class SearchForm(forms.Form):
     search = forms.CharField(label="", required=False, widget=forms.widgets.TextInput())
 
 
+def _unique_field_specs(unique_fields):
+    """
+    Returns a list of (field_name, case_insensitive) tuples for the
+    `unique_fields` setting.
+    """
+    specs = []
+    for field in unique_fields:
+        if isinstance(field, dict):
+            specs.append((field["field"], field.get("case_insensitive", False)))
+        else:
+            specs.append((field, False))
+    return specs
+
+
+def _normalise(value, case_insensitive):
+    # Related objects are compared by primary key, as values_list() returns.
+    if isinstance(value, models.Model):
+        return value.pk
+    if case_insensitive and isinstance(value, str):
+        return value.lower()
+    return value
+
+
+def _unavailable(field):
+    return _("That {} is not available.".format(field.replace("_", " ")))
+
+
 class UniqueModelFieldsMixin:
     """
     Mixin that enforces unique fields on ModelForm form fields.
@@ -22,40 +54,121 @@ class UniqueModelFieldsMixin:
 
     unique_fields = ['name', 'username']
     unique_fields = ['name',  {'field': 'username', 'case_insensitive': True}]
+
+    All of the fields are checked with a single query, which compares the
+    values in the database (so related objects and collations work as
+    they do for the lookups).
     """
 
     unique_fields = []
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def clean(self):
+        cleaned_data = super().clean()
+        self.validate_unique_fields()
+        return cleaned_data
 
-        def _make_validator(field, case_insensitive):
-            model = self.Meta.model
-            value = self.cleaned_data.get(field)
-
-            if not value:
-                # Otherwise null/empty string is not allowed more than once.
-                return value
+    def validate_unique_fields(self):
+        # Otherwise null/empty string is not allowed more than once.
+        specs = [
+            (field, case_insensitive)
+            for field, case_insensitive in _unique_field_specs(self.unique_fields)
+            if self.cleaned_data.get(field)
+        ]
+        if not specs:
+            return
 
+        model = self.Meta.model
+        predicates = []
+        for field, case_insensitive in specs:
             case = "i" if case_insensitive else ""
-            qs = model.objects.filter(**{field + "__{}exact".format(case): value})
-            if self.instance.pk:
-                qs = qs.exclude(pk=self.instance.pk)
-
-            if qs.exists():
-                raise forms.ValidationError(
-                    _("That {} is not available.".format(field.replace("_", " ")))
+            lookup = field + "__{}exact".format(case)
+            predicates.append(Q(**{lookup: self.cleaned_data[field]}))
+        qs = model.objects.filter(reduce(operator.or_, predicates))
+        if self.instance.pk:
+            qs = qs.exclude(pk=self.instance.pk)
+        # Flag which fields matched any row, e.g. {'_unique_0': 1}.
+        taken = qs.aggregate(
+            **{
+                "_unique_{}".format(i): Max(
+                    Case(
+                        When(predicate, then=Value(1)),
+                        default=Value(0),
+                        output_field=IntegerField(),
+                    )
                 )
-            return value
+                for i, predicate in enumerate(predicates)
+            }
+        )
+
+        for i, (field, case_insensitive) in enumerate(specs):
+            if taken["_unique_{}".format(i)]:
+                self.add_error(field, _unavailable(field))
 
-        for field in self.unique_fields:
-            if isinstance(field, dict):
-                case_insensitive = field.get("case_insensitive", False)
-                field_name = field["field"]
+
+class UniqueModelFieldsFormSetMixin:
+    """
+    Mixin that enforces unique fields across every form of a model formset,
+    including duplicates within the formset itself, using a single query
+    for the whole formset rather than one per form.
+
+    Must be left of BaseModelFormSet when defining the formset class. The
+    forms themselves don't need UniqueModelFieldsMixin.
+
+    unique_fields = ['name', {'field': 'username', 'case_insensitive': True}]
+    """
+
+    unique_fields = []
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            # Don't bother validating the formset unless each form is valid.
+            return
+        self.validate_unique_fields()
+
+    def validate_unique_fields(self):
+        specs = _unique_field_specs(self.unique_fields)
+        forms = [
+            form
+            for form in self.forms
+            if not (self.can_delete and self._should_delete_form(form))
+        ]
+
+        # Map each field's (normalised) values to the forms using them,
+        # flagging duplicates within the formset as we go.
+        values = {}
+        for field, case_insensitive in specs:
+            values[field] = {}
+            for form in forms:
+                value = form.cleaned_data.get(field)
+                if not value:
+                    continue
+                value = _normalise(value, case_insensitive)
+                if value in values[field]:
+                    form.add_error(field, _unavailable(field))
+                    continue
+                values[field][value] = form
+
+        predicates = []
+        annotations = {}
+        for field, case_insensitive in specs:
+            if not values[field]:
+                continue
+            if case_insensitive:
+                annotations["_unique_" + field] = Lower(field)
+                lookup = "_unique_" + field + "__in"
             else:
-                field_name = field
-                case_insensitive = False
-            func_name = "clean_{}".format(field_name)
-            setattr(
-                self, func_name, curry(_make_validator, field_name, case_insensitive)
-            )
+                lookup = field + "__in"
+            predicates.append(Q(**{lookup: list(values[field])}))
+        if not predicates:
+            return
+
+        fields = [field for field, _ci in specs]
+        qs = self.model.objects.annotate(**annotations)
+        qs = qs.filter(reduce(operator.or_, predicates))
+        for row in qs.values_list("pk", *fields):
+            for i, (field, case_insensitive) in enumerate(specs, start=1):
+                form = values[field].get(_normalise(row[i], case_insensitive))
+                if form is not None and form.instance.pk != row[0]:
+                    if field in form.cleaned_data:
+                        form.add_error(field, _unavailable(field))
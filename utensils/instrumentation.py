@@ -0,0 +1,226 @@
+from contextlib import contextmanager
+import logging
+import re
+import socket
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.response import TemplateResponse
+from django.utils.module_loading import import_string
+
+
+"""
+Per-request timings and SQL query counts for views.
+
+Add `utensils.middleware.InstrumentationMiddleware` to collect them and
+`viewmixins.InstrumentedViewMixin` to a view to time its phases:
+
+  UTENSILS_INSTRUMENTATION_SINKS = [
+      'utensils.instrumentation.LoggingSink',
+      'utensils.instrumentation.StatsdSink',
+  ]
+  UTENSILS_N_PLUS_ONE_THRESHOLD = 5
+"""
+
+logger = logging.getLogger("utensils.instrumentation")
+
+# Strings and numbers in logged SQL, replaced to find repeated queries.
+SQL_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Backends that can't interpolate the parameters log them separately.
+UNINTERPOLATED_SQL = re.compile(r"QUERY = (.*?) - PARAMS = ", re.DOTALL)
+
+
+class LoggingSink:
+    """
+    Logs each request's record to the 'utensils.instrumentation' logger.
+    """
+
+    def emit(self, record):
+        logger.info(
+            "%s %s %.1fms %d queries",
+            record["view"],
+            record["path"],
+            record["total"]["duration"],
+            record["total"]["queries"],
+            extra={"instrumentation": record},
+        )
+
+
+class StatsdSink:
+    """
+    Sends timers, and query counts as gauges, in the statsd line format over
+    UDP. Uses the STATSD_HOST, STATSD_PORT and STATSD_PREFIX settings.
+    """
+
+    def __init__(self, host=None, port=None, prefix=None):
+        self.address = (
+            host or getattr(settings, "STATSD_HOST", "localhost"),
+            port or getattr(settings, "STATSD_PORT", 8125),
+        )
+        self.prefix = prefix or getattr(settings, "STATSD_PREFIX", "utensils")
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def emit(self, record):
+        view = record["view"].replace(".", "_")
+        lines = []
+        for name, phase in dict(record["phases"], total=record["total"]).items():
+            key = "{}.{}.{}".format(self.prefix, view, name)
+            lines.append("{}.time:{:.3f}|ms".format(key, phase["duration"]))
+            lines.append("{}.queries:{}|g".format(key, phase["queries"]))
+        try:
+            self.socket.sendto("\n".join(lines).encode("utf-8"), self.address)
+        except (socket.error, OSError):
+            logger.exception("Could not send timings to statsd.")
+
+
+class MemorySink:
+    """
+    Keeps every record in `MemorySink.records`, for tests. The records are
+    shared by every instance, call `MemorySink.clear()` between tests.
+    """
+
+    records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    @classmethod
+    def clear(cls):
+        del cls.records[:]
+
+
+def get_sinks():
+    paths = getattr(
+        settings,
+        "UTENSILS_INSTRUMENTATION_SINKS",
+        ["utensils.instrumentation.LoggingSink"],
+    )
+    return [import_string(path)() for path in paths]
+
+
+class RequestTimings:
+    """
+    Collects the timings and queries of each phase of a request. Phases with
+    the same name are added together.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.phases = {}
+        self.view = ""
+        self.debug_cursors = {}
+        for connection in connections.all():
+            # Log queries for this request even when DEBUG is False.
+            self.debug_cursors[connection.alias] = connection.force_debug_cursor
+            connection.force_debug_cursor = True
+        self.query_start = self.query_position()
+
+    def query_position(self):
+        return dict(
+            (connection.alias, len(connection.queries_log))
+            for connection in connections.all()
+        )
+
+    def queries_since(self, position):
+        queries = []
+        for connection in connections.all():
+            log = list(connection.queries_log)
+            queries.extend(log[position.get(connection.alias, 0) :])
+        return queries
+
+    def add(self, name, duration, queries):
+        phase = self.phases.setdefault(
+            name, {"duration": 0.0, "queries": 0, "query_time": 0.0}
+        )
+        phase["duration"] += duration
+        phase["queries"] += len(queries)
+        phase["query_time"] += sum(float(q["time"]) * 1000 for q in queries)
+
+    def finish(self, request, response):
+        for connection in connections.all():
+            connection.force_debug_cursor = self.debug_cursors.get(
+                connection.alias, False
+            )
+        queries = self.queries_since(self.query_start)
+        total = {
+            "duration": (time.time() - self.started) * 1000,
+            "queries": len(queries),
+            "query_time": sum(float(q["time"]) * 1000 for q in queries),
+        }
+        return {
+            "view": self.view,
+            "path": request.path,
+            "status": response.status_code,
+            "phases": self.phases,
+            "total": total,
+            "n_plus_one": find_repeated_queries(queries),
+        }
+
+
+def find_repeated_queries(queries, threshold=None):
+    """
+    Returns a list of (sql, count) for queries that differ only in their
+    parameters and were run at least `threshold` times, which is usually an
+    N+1 pattern such as following a foreign key for every row of a list.
+    """
+    if threshold is None:
+        threshold = getattr(settings, "UTENSILS_N_PLUS_ONE_THRESHOLD", 5)
+    counts = {}
+    for query in queries:
+        match = UNINTERPOLATED_SQL.match(query["sql"])
+        if match:
+            sql = match.group(1)
+        else:
+            sql = SQL_LITERALS.sub("?", query["sql"])
+        counts[sql] = counts.get(sql, 0) + 1
+    return [(sql, count) for sql, count in counts.items() if count >= threshold]
+
+
+def server_timing(record):
+    """
+    Returns the value of a Server-Timing header for the record.
+    """
+    metrics = []
+    for name, phase in sorted(record["phases"].items()):
+        metrics.append(
+            '{};dur={:.1f};desc="{} queries"'.format(
+                name, phase["duration"], phase["queries"]
+            )
+        )
+    metrics.append(
+        'total;dur={:.1f};desc="{} queries"'.format(
+            record["total"]["duration"], record["total"]["queries"]
+        )
+    )
+    return ", ".join(metrics)
+
+
+@contextmanager
+def instrument(request, name):
+    """
+    Times the block as the phase `name` of the request. Does nothing unless
+    InstrumentationMiddleware is installed.
+    """
+    timings = getattr(request, "utensils_timings", None)
+    if timings is None:
+        yield
+        return
+    position = timings.query_position()
+    started = time.time()
+    try:
+        yield
+    finally:
+        duration = (time.time() - started) * 1000
+        timings.add(name, duration, timings.queries_since(position))
+
+
+class InstrumentedTemplateResponse(TemplateResponse):
+    """
+    TemplateResponse that times rendering as the 'render' phase.
+    """
+
+    @property
+    def rendered_content(self):
+        with instrument(self._request, "render"):
+            return super().rendered_content
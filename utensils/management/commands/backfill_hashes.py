@@ -0,0 +1,82 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, Q, Value, When
+
+from utensils.models import HashedTimeStampedModel, TimeStampedModel
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills in the stored hash of HashedTimeStampedModel rows that don't "
+        "have one yet, e.g. after switching a model to it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Models to backfill, by default every HashedTimeStampedModel.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of rows updated by each query.",
+        )
+
+    def get_models(self, labels):
+        if not labels:
+            return [
+                model
+                for model in apps.get_models()
+                if issubclass(model, HashedTimeStampedModel)
+            ]
+        models = []
+        for label in labels:
+            try:
+                model = apps.get_model(label)
+            except (LookupError, ValueError):
+                raise CommandError("Unknown model: {}".format(label))
+            if not issubclass(model, HashedTimeStampedModel):
+                raise CommandError("{} is not a HashedTimeStampedModel.".format(label))
+            models.append(model)
+        return models
+
+    def backfill(self, model, batch_size):
+        queryset = model._base_manager.filter(
+            Q(stored_hash__isnull=True) | Q(stored_hash="")
+        ).order_by("pk")
+        total = 0
+        last_pk = None
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            objects = list(batch.only("pk", "created")[:batch_size])
+            if not objects:
+                return total
+            # One UPDATE per batch, setting each row's hash with CASE.
+            hashes = Case(
+                *[
+                    When(pk=obj.pk, then=Value(TimeStampedModel.hash.fget(obj)))
+                    for obj in objects
+                ],
+                output_field=CharField()
+            )
+            with transaction.atomic():
+                model._base_manager.filter(pk__in=[obj.pk for obj in objects]).update(
+                    stored_hash=hashes
+                )
+            total += len(objects)
+            last_pk = objects[-1].pk
+
+    def handle(self, *args, **options):
+        for model in self.get_models(options["models"]):
+            count = self.backfill(model, options["batch_size"])
+            self.stdout.write(
+                "Backfilled {} {}.{} hashes.".format(
+                    count, model._meta.app_label, model._meta.object_name
+                )
+            )
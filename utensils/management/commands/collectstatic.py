@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.staticfiles.management.commands import collectstatic
+
+
+class Command(collectstatic.Command):
+    """
+    collectstatic that, with the utensils S3 storages, uploads files in
+    parallel and skips files whose content matches the copy on S3 (rather
+    than comparing modification times, which change on every checkout).
+
+    Takes over from the staticfiles command when `utensils` is above
+    `django.contrib.staticfiles` in INSTALLED_APPS.
+    """
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=10,
+            help="Number of files to upload to S3 at once.",
+        )
+
+    def set_options(self, **options):
+        super().set_options(**options)
+        self.workers = options.get("workers", 10)
+        # Post processing needs every file to be in place first.
+        self.parallel = (
+            hasattr(self.storage, "etag_matches")
+            and self.workers > 1
+            and not (self.post_process and hasattr(self.storage, "post_process"))
+        )
+
+    def collect(self):
+        if not self.parallel:
+            return super().collect()
+
+        if self.storage.preload_metadata:
+            # List the bucket once before the threads need it.
+            self.storage.entries
+        self.queued_files = set()
+        self.uploads = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            self.executor = executor
+            collected = super().collect()
+        for upload in self.uploads:
+            upload.result()
+        # The list of modified files was made before the uploads finished.
+        collected["modified"] = self.copied_files + self.symlinked_files
+        return collected
+
+    def copy_file(self, path, prefixed_path, source_storage):
+        if not self.parallel:
+            return super().copy_file(path, prefixed_path, source_storage)
+
+        # The first file found for a path wins, so check before queueing.
+        if prefixed_path in self.queued_files:
+            return self.log("Skipping '%s' (already copied earlier)" % path)
+        self.queued_files.add(prefixed_path)
+        self.uploads.append(
+            self.executor.submit(super().copy_file, path, prefixed_path, source_storage)
+        )
+
+    def delete_file(self, path, prefixed_path, source_storage):
+        if not hasattr(self.storage, "etag_matches") or not self.storage.file_overwrite:
+            return super().delete_file(path, prefixed_path, source_storage)
+
+        if self.storage.etag_matches(prefixed_path, source_storage.path(path)):
+            if prefixed_path not in self.unmodified_files:
+                self.unmodified_files.append(prefixed_path)
+            self.log("Skipping '%s' (not modified)" % path)
+            return False
+        # Uploading replaces the file, so there's no need to delete it first.
+        return True
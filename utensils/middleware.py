@@ -1,28 +1,104 @@
+import re
+
 from django.conf import settings
 from django.http import HttpResponseForbidden
+from django.utils.crypto import constant_time_compare, salted_hmac
 
-
-HIDDEN_SITE_SECRET = getattr(settings, "HIDDEN_SITE_SECRET", None)
+from .instrumentation import RequestTimings, get_sinks, logger, server_timing
 
 
 class HiddenSiteMiddleware:
     """
     Blocks pages unless a cookie or GET parameter is present.
     E.g. /some/path/?secret (where 'secret' is HIDDEN_SITE_SECRET)
+
+    Paths starting with one of HIDDEN_SITE_ALLOWED_PATHS (e.g. health checks
+    or static files) are never blocked. The cookie holds an HMAC of the
+    secret rather than a flag, so it can't be forged and changing the secret
+    locks out old visitors.
+
+    Works in both MIDDLEWARE_CLASSES and the new style MIDDLEWARE setting.
     """
 
     COOKIE_NAME = "hidden_site_secret"
+    COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+        # Read the settings once rather than on every request.
+        self.secret = getattr(settings, "HIDDEN_SITE_SECRET", None)
+        self.token = salted_hmac(
+            "utensils.middleware.HiddenSiteMiddleware", self.secret or ""
+        ).hexdigest()
+        allowed_paths = getattr(settings, "HIDDEN_SITE_ALLOWED_PATHS", ())
+        self.allowed_paths = None
+        if allowed_paths:
+            self.allowed_paths = re.compile(
+                "|".join(re.escape(path) for path in allowed_paths)
+            )
+
+    def __call__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return self.process_response(request, response)
 
     def process_request(self, request):
-        if self.COOKIE_NAME in request.COOKIES or request.GET.has_key(
-            HIDDEN_SITE_SECRET
-        ):
+        if self.allowed_paths is not None and self.allowed_paths.match(request.path):
+            return None
+        cookie = request.COOKIES.get(self.COOKIE_NAME)
+        if cookie is not None and constant_time_compare(cookie, self.token):
+            return None
+        if self.secret is not None and self.secret in request.GET:
+            request.hidden_site_unlocked = True
             return None
         return HttpResponseForbidden("ACCESS DENIED")
 
     def process_response(self, request, response):
-        if not self.COOKIE_NAME in request.COOKIES and request.GET.has_key(
-            HIDDEN_SITE_SECRET
-        ):
-            response.set_cookie(self.COOKIE_NAME, True, max_age=365 * 24 * 60 * 60)
+        if getattr(request, "hidden_site_unlocked", False):
+            response.set_cookie(
+                self.COOKIE_NAME, self.token, max_age=self.COOKIE_MAX_AGE, httponly=True
+            )
+        return response
+
+
+class InstrumentationMiddleware:
+    """
+    Records timings and SQL query counts for each request, adds them to the
+    response as a Server-Timing header, sends them to the sinks in
+    UTENSILS_INSTRUMENTATION_SINKS and warns about repeated (N+1) queries.
+
+    Works in both MIDDLEWARE_CLASSES and the new style MIDDLEWARE setting.
+    """
+
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+        self.sinks = get_sinks()
+
+    def __call__(self, request):
+        # The handler calls process_view() itself, as for old style middleware.
+        self.process_request(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request):
+        request.utensils_timings = RequestTimings()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, "view_class", view_func)
+        request.utensils_timings.view = "{}.{}".format(view.__module__, view.__name__)
+
+    def process_response(self, request, response):
+        timings = getattr(request, "utensils_timings", None)
+        if timings is None:
+            return response
+        del request.utensils_timings
+        record = timings.finish(request, response)
+        response["Server-Timing"] = server_timing(record)
+        for sql, count in record["n_plus_one"]:
+            logger.warning(
+                "%s ran a similar query %d times: %s", record["view"], count, sql
+            )
+        for sink in self.sinks:
+            sink.emit(record)
         return response
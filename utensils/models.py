@@ -2,9 +2,15 @@ import hashlib
 import time
 
 from django.db import models
+from django.utils.crypto import constant_time_compare
 from django.utils.translation import ugettext_lazy as _
 
 
+# Number of characters of a hash matched by the database in get_by_hash(),
+# the rest are compared in constant time.
+HASH_SELECTOR_LENGTH = 8
+
+
 # Abstract models
 
 
@@ -26,7 +32,8 @@ class TimeStampedModel(models.Model):
 
     @property
     def date_hash(self):
-        return hashlib.sha1(str(self.pk) + str(self.created)).hexdigest()[::2]
+        value = str(self.pk) + str(self.created)
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()[::2]
 
     @property
     def time_hash(self):
@@ -34,10 +41,68 @@ class TimeStampedModel(models.Model):
 
     @property
     def hash(self):
-        return hashlib.sha1(self.date_hash + self.time_hash).hexdigest()
+        value = self.date_hash + self.time_hash
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()
 
     def challenge_hash(self, challenger):
-        return challenger == self.hash
+        return constant_time_compare(str(challenger), self.hash)
+
+
+class HashedManager(models.Manager):
+    def get_by_hash(self, value):
+        """
+        Returns the object whose stored hash is `value`, using the index.
+
+        Only the start of the hash is matched by the database; candidates
+        are checked against the whole hash in constant time so the time
+        taken doesn't reveal how much of a guessed hash was right.
+        """
+        value = str(value)
+        candidates = self.filter(stored_hash__startswith=value[:HASH_SELECTOR_LENGTH])
+        if len(value) == 40:
+            for obj in candidates:
+                if constant_time_compare(obj.stored_hash, value):
+                    return obj
+        raise self.model.DoesNotExist(
+            "%s matching hash does not exist." % self.model._meta.object_name
+        )
+
+
+class HashedTimeStampedModel(TimeStampedModel):
+    """
+    A TimeStampedModel that stores its hash in an indexed column when it is
+    first saved, so it isn't recomputed on every access and objects can be
+    looked up by it:
+
+        photo = Photo.objects.get_by_hash(request.GET["h"])
+
+    Rows that existed before switching to this model (which get a NULL
+    hash when the column is added) can be filled in with the
+    `backfill_hashes` management command.
+    """
+
+    stored_hash = models.CharField(
+        _("hash"), max_length=40, null=True, blank=True, db_index=True, editable=False
+    )
+
+    objects = HashedManager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def hash(self):
+        return self.stored_hash or super().hash
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if not self.stored_hash:
+            # The hash uses the primary key, so it can only be made once
+            # the row has been inserted.
+            self.stored_hash = super().hash
+            type(self)._base_manager.using(self._state.db).filter(pk=self.pk).update(
+                stored_hash=self.stored_hash
+            )
 
 
 class AddressedModel(models.Model):
@@ -45,12 +110,8 @@ class AddressedModel(models.Model):
     Add common address fields to a model easily.
     """
 
-    address_1 = models.CharField(
-        _("address 1"), max_length=128, null=False, blank=True
-    )
-    address_2 = models.CharField(
-        _("address 2"), max_length=128, null=False, blank=True
-    )
+    address_1 = models.CharField(_("address 1"), max_length=128, null=False, blank=True)
+    address_2 = models.CharField(_("address 2"), max_length=128, null=False, blank=True)
     city = models.CharField(_("City/Town"), max_length=64, null=False, blank=True)
     county = models.CharField(_("county"), max_length=64, null=False, blank=True)
     postal_code = models.CharField(
@@ -0,0 +1,365 @@
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+from functools import reduce
+import operator
+import uuid
+
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Paginator as DjangoPaginator
+from django.db import connections
+from django.db.models import Model, Q
+from django.utils.dateparse import parse_date, parse_datetime, parse_time
+from django.utils.functional import cached_property
+
+from .checks import _resolve_field
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class ExactCount:
+    """
+    Counts the rows with a COUNT(*) query (or len() for plain lists).
+    """
+
+    def count(self, object_list):
+        try:
+            return object_list.count()
+        except (AttributeError, TypeError):
+            # AttributeError if object_list has no count() method.
+            # TypeError if object_list.count() requires arguments
+            # (i.e. is of type list).
+            return len(object_list)
+
+
+class CachedCount(ExactCount):
+    """
+    Caches the exact count in Django's cache framework for `timeout` seconds,
+    keyed on the SQL of the (unordered) query so identical searches share a
+    count.
+    """
+
+    def __init__(self, timeout=300, cache_alias="default", key_prefix="utensils-count"):
+        self.timeout = timeout
+        self.cache_alias = cache_alias
+        self.key_prefix = key_prefix
+
+    def get_cache_key(self, queryset):
+        # Ordering doesn't change the count so leave it out of the key.
+        queryset = queryset.order_by()
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        digest = hashlib.md5((sql + repr(params)).encode("utf-8")).hexdigest()
+        return "{}:{}:{}".format(self.key_prefix, queryset.db, digest)
+
+    def count(self, object_list):
+        if not hasattr(object_list, "query"):
+            return super().count(object_list)
+        cache = caches[self.cache_alias]
+        key = self.get_cache_key(object_list)
+        count = cache.get(key)
+        if count is None:
+            count = super().count(object_list)
+            cache.set(key, count, self.timeout)
+        return count
+
+
+class EstimatedCount(ExactCount):
+    """
+    Uses the query planner's row estimate when it is at least `threshold`
+    rows, otherwise falls back to an exact count. Large results show an
+    approximate total but skip the COUNT(*) over the whole table.
+
+    Only PostgreSQL is supported, other databases always get an exact count.
+    """
+
+    def __init__(self, threshold=10000):
+        self.threshold = threshold
+
+    def estimate(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        sql, params = queryset.order_by().query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def count(self, object_list):
+        if hasattr(object_list, "query"):
+            estimate = self.estimate(object_list)
+            if estimate is not None and estimate >= self.threshold:
+                return estimate
+        return super().count(object_list)
+
+
+class Paginator(DjangoPaginator):
+    """
+    Django's Paginator with a pluggable count strategy (see ExactCount,
+    CachedCount and EstimatedCount).
+    """
+
+    def __init__(self, *args, count_strategy=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.count_strategy = count_strategy or ExactCount()
+
+    @cached_property
+    def count(self):
+        return self.count_strategy.count(self.object_list)
+
+
+def _reverse_field(field):
+    return field[1:] if field.startswith("-") else "-" + field
+
+
+def _field_value(obj, field):
+    """
+    Follows a (possibly related) field lookup such as 'author__last_name'
+    and returns the value found on the object.
+    """
+    value = obj
+    for attr in field.lstrip("-").split("__"):
+        if value is None:
+            break
+        value = getattr(value, attr)
+    if isinstance(value, Model):
+        value = value.pk
+    return value
+
+
+# Cursor values that JSON can't hold exactly, stored as {tag: string}.
+# DjangoJSONEncoder would cut datetimes down to milliseconds.
+CURSOR_TYPES = [
+    ("dt", datetime.datetime, parse_datetime),
+    ("d", datetime.date, parse_date),
+    ("t", datetime.time, parse_time),
+    ("dec", decimal.Decimal, decimal.Decimal),
+    ("uuid", uuid.UUID, uuid.UUID),
+]
+
+
+def _encode_value(value):
+    for tag, cls, parse in CURSOR_TYPES:
+        if isinstance(value, cls):
+            return {
+                tag: value.isoformat() if hasattr(value, "isoformat") else str(value)
+            }
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        for tag, cls, parse in CURSOR_TYPES:
+            if tag in value:
+                parsed = parse(value[tag])
+                if parsed is None:
+                    raise ValueError("Invalid {} value.".format(tag))
+                return parsed
+        raise ValueError("Unknown cursor value.")
+    return value
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset by seeking past the last row seen rather than using
+    OFFSET, so deep pages cost the same as the first and no COUNT(*) is
+    needed.
+
+    `ordering` is a list of order_by() style field names. The last field
+    must be unique (usually 'pk') so that every row has a stable position.
+    Pages are requested with opaque cursor tokens rather than page numbers.
+    """
+
+    def __init__(self, object_list, per_page, ordering, count_strategy=None):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = [self.resolve_ordering_field(field) for field in ordering]
+        self.count_strategy = count_strategy or ExactCount()
+
+    def resolve_ordering_field(self, field):
+        """
+        Orders foreign keys by the related primary key, which is what the
+        cursor stores, rather than by the related model's Meta.ordering.
+        """
+        model = getattr(self.object_list, "model", None)
+        resolved = _resolve_field(model, field.lstrip("-")) if model else None
+        if (
+            resolved is not None
+            and (resolved.many_to_one or resolved.one_to_one)
+            and not resolved.primary_key
+        ):
+            return field + "__pk"
+        return field
+
+    @cached_property
+    def count(self):
+        """
+        Not used by the pagination controls, but available when a total is
+        wanted, e.g. for the search result message.
+        """
+        return self.count_strategy.count(self.object_list)
+
+    def encode_cursor(self, obj, previous=False):
+        data = {
+            "o": self.ordering,
+            "v": [_encode_value(_field_value(obj, field)) for field in self.ordering],
+            "p": previous,
+        }
+        payload = json.dumps(data, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+    def decode_cursor(self, cursor):
+        """
+        Returns a tuple of (values, previous) for the cursor. Cursors created
+        for a different ordering (e.g. the user changed the sort column) are
+        treated as the first page.
+        """
+        try:
+            payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+            data = json.loads(payload.decode("utf-8"))
+            ordering, values, previous = data["o"], data["v"], data["p"]
+            values = [_decode_value(value) for value in values]
+        except (
+            ValueError,
+            TypeError,
+            KeyError,
+            UnicodeError,
+            decimal.InvalidOperation,
+        ):
+            raise InvalidCursor("That cursor is not valid.")
+        if ordering != self.ordering or len(values) != len(ordering):
+            return None, False
+        values = [
+            self.clean_value(field, value) for field, value in zip(ordering, values)
+        ]
+        return values, bool(previous)
+
+    def clean_value(self, field, value):
+        """
+        Converts a cursor value with the ordering field's to_python(), so a
+        tampered cursor gives InvalidCursor rather than a database error.
+        """
+        if value is None:
+            return None
+        if isinstance(value, (list, dict)):
+            raise InvalidCursor("That cursor is not valid.")
+        model = getattr(self.object_list, "model", None)
+        resolved = _resolve_field(model, field) if model else None
+        if resolved is None:
+            return value
+        try:
+            return resolved.get_prep_value(resolved.to_python(value))
+        except (ValidationError, ValueError, TypeError):
+            raise InvalidCursor("That cursor is not valid.")
+
+    def seek_filter(self, ordering, values):
+        """
+        Builds the row value comparison `(a, b) > (x, y)` for the ordering as
+        `a > x OR (a = x AND b > y)`, respecting each field's direction and
+        where the database sorts NULLs.
+        """
+        features = connections[self.object_list.db].features
+        predicates = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            # NULLs sort last when ascending if they count as the largest.
+            nulls_last = features.nulls_order_largest != descending
+            if values[i] is None:
+                if nulls_last:
+                    # Nothing sorts after NULL, only other NULLs tie with it.
+                    continue
+                q = Q(**{name + "__isnull": False})
+            else:
+                lookup = "lt" if descending else "gt"
+                q = Q(**{"{}__{}".format(name, lookup): values[i]})
+                if nulls_last:
+                    q |= Q(**{name + "__isnull": True})
+            for prior, value in zip(ordering[:i], values[:i]):
+                prior = prior.lstrip("-")
+                if value is None:
+                    q &= Q(**{prior + "__isnull": True})
+                else:
+                    q &= Q(**{prior: value})
+            predicates.append(q)
+        if not predicates:
+            return Q(pk__in=[])
+        return reduce(operator.or_, predicates)
+
+    def page(self, cursor=None):
+        values, previous = None, False
+        if cursor:
+            values, previous = self.decode_cursor(cursor)
+
+        ordering = self.ordering
+        if previous:
+            ordering = [_reverse_field(field) for field in ordering]
+
+        qs = self.object_list.order_by(*ordering)
+        if values is not None:
+            qs = qs.filter(self.seek_filter(ordering, values))
+
+        # Fetch one extra row to find out if there is another page.
+        object_list = list(qs[: self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+
+        if previous:
+            object_list.reverse()
+            return KeysetPage(object_list, self, has_next=True, has_previous=has_more)
+        return KeysetPage(
+            object_list, self, has_next=has_more, has_previous=values is not None
+        )
+
+
+class KeysetPage:
+    """
+    A page of results from KeysetPaginator. Mirrors the parts of Django's
+    Page that make sense without knowing the total count.
+    """
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return "<Keyset page of {} objects>".format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous():
+            return self.paginator.encode_cursor(self.object_list[0], previous=True)
@@ -0,0 +1,209 @@
+from functools import reduce
+import operator
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import connections
+from django.db.models import Q
+
+
+"""
+Search backends used by `viewmixins.SearchFormMixin`.
+
+A backend takes the view's queryset, its `search_fields` dictionary and the
+search term and returns the filtered queryset. Set `search_backend` on the
+view to choose one:
+
+  class BookListView(BaseListView):
+      model = Book
+      search_backend = PostgresSearchBackend(config="english")
+      search_fields = {
+          "title": "icontains",
+          "author__last_name": "icontains",
+      }
+"""
+
+
+class BaseSearchBackend:
+    def filter(self, queryset, search_fields, term):
+        raise NotImplementedError(
+            "Subclasses of BaseSearchBackend must provide a filter() method."
+        )
+
+
+def spans_multi_valued_relation(model, path):
+    """
+    Returns True if the lookup path (e.g. 'books__title') follows a reverse
+    foreign key or many to many relation, and so can match a row more than
+    once when joined.
+    """
+    opts = model._meta
+    for name in path.split("__"):
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not field.is_relation:
+            return False
+        if field.many_to_many or field.one_to_many:
+            return True
+        opts = field.related_model._meta
+    return False
+
+
+class IContainsSearchBackend(BaseSearchBackend):
+    """
+    The default backend. ORs together a lookup (usually 'icontains') for each
+    of the search fields.
+
+    Lookups across multi-valued relations are turned into `pk IN (SELECT
+    ...)` subqueries so the results don't need a DISTINCT to remove the
+    duplicate rows a join would produce.
+    """
+
+    def get_predicate(self, queryset, field, lookup, term):
+        predicate = Q(**{field + "__" + lookup: term})
+        if spans_multi_valued_relation(queryset.model, field):
+            subquery = queryset.model._base_manager.filter(predicate).values("pk")
+            predicate = Q(pk__in=subquery)
+        return predicate
+
+    def filter(self, queryset, search_fields, term):
+        # Build a list of Q filter objects for the fields to search and what
+        # to search them with.
+        qsfilter = [
+            self.get_predicate(queryset, k, search_fields[k], term)
+            for k in search_fields.keys()
+        ]
+        # Join them together with the or operator and pass them to filter
+        return queryset.filter(reduce(operator.or_, qsfilter))
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    PostgreSQL full text search across the search fields (the lookup types
+    are ignored) with to_tsvector() and plainto_tsquery(). Results are
+    ordered by rank unless the user picks a sort column. Only fields on the
+    model itself can be searched.
+
+    For large tables keep the vector in a tsvector column with a GIN index
+    (e.g. added with a `RunSQL` migration and kept up to date by a trigger)
+    and pass its name as `vector_column`, otherwise the vector is built for
+    every row on each search.
+    """
+
+    def __init__(self, config=None, vector_column=None, rank=True):
+        self.config = config
+        self.vector_column = vector_column
+        self.rank = rank
+
+    def get_vector(self, queryset, search_fields, qn):
+        """
+        Returns the SQL and params for the document's tsvector.
+        """
+        table = qn(queryset.model._meta.db_table)
+        if self.vector_column:
+            return "{}.{}".format(table, qn(self.vector_column)), []
+        columns = []
+        for path in search_fields:
+            try:
+                field = queryset.model._meta.get_field(path)
+            except FieldDoesNotExist:
+                field = None
+            if field is None or field.is_relation:
+                raise ImproperlyConfigured(
+                    "PostgresSearchBackend can only search fields on the model "
+                    "itself, not '{}'.".format(path)
+                )
+            columns.append("COALESCE({}.{}::text, '')".format(table, qn(field.column)))
+        document = " || ' ' || ".join(columns)
+        if self.config:
+            return "to_tsvector(%s::regconfig, {})".format(document), [self.config]
+        return "to_tsvector({})".format(document), []
+
+    def get_query(self, term):
+        """
+        Returns the SQL and params for the search term's tsquery.
+        """
+        if self.config:
+            return "plainto_tsquery(%s::regconfig, %s)", [self.config, term]
+        return "plainto_tsquery(%s)", [term]
+
+    def filter(self, queryset, search_fields, term):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            raise ImproperlyConfigured("PostgresSearchBackend requires PostgreSQL.")
+        qn = connection.ops.quote_name
+        vector, vector_params = self.get_vector(queryset, search_fields, qn)
+        query, query_params = self.get_query(term)
+        queryset = queryset.extra(
+            where=["{} @@ {}".format(vector, query)],
+            params=vector_params + query_params,
+        )
+        if self.rank:
+            queryset = queryset.extra(
+                select={"search_rank": "ts_rank({}, {})".format(vector, query)},
+                select_params=vector_params + query_params,
+            ).order_by("-search_rank")
+        return queryset
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 full text search, handy for local development and tests.
+    The lookup types in the search fields are ignored, the search is run
+    against `table`, an FTS5 table whose rowid is the model's primary key.
+
+    `create_table_sql()` returns the statements to create an external
+    content FTS5 table, and the triggers to keep it up to date, for use in
+    a `RunSQL` migration. Only fields on the model itself can be indexed
+    this way.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def match_expression(self, term):
+        # Quote each word so FTS5 query syntax in user input is matched
+        # literally, and allow prefix matches.
+        words = ['"{}"*'.format(word.replace('"', '""')) for word in term.split()]
+        return " ".join(words)
+
+    def filter(self, queryset, search_fields, term):
+        expression = self.match_expression(term)
+        if not expression:
+            return queryset
+        opts = queryset.model._meta
+        where = '"{}"."{}" IN (SELECT rowid FROM "{}" WHERE "{}" MATCH %s)'.format(
+            opts.db_table, opts.pk.column, self.table, self.table
+        )
+        return queryset.extra(where=[where], params=[expression])
+
+    def create_table_sql(self, model, fields):
+        opts = model._meta
+        columns = [opts.get_field(field).column for field in fields]
+        context = {
+            "table": self.table,
+            "content": opts.db_table,
+            "pk": opts.pk.column,
+            "columns": ", ".join(columns),
+            "new_columns": ", ".join("new." + column for column in columns),
+            "old_columns": ", ".join("old." + column for column in columns),
+        }
+        statements = [
+            "CREATE VIRTUAL TABLE {table} USING fts5({columns}, "
+            "content='{content}', content_rowid='{pk}')",
+            "CREATE TRIGGER {table}_ai AFTER INSERT ON {content} BEGIN "
+            "INSERT INTO {table}(rowid, {columns}) VALUES (new.{pk}, {new_columns}); "
+            "END",
+            "CREATE TRIGGER {table}_ad AFTER DELETE ON {content} BEGIN "
+            "INSERT INTO {table}({table}, rowid, {columns}) "
+            "VALUES ('delete', old.{pk}, {old_columns}); "
+            "END",
+            "CREATE TRIGGER {table}_au AFTER UPDATE ON {content} BEGIN "
+            "INSERT INTO {table}({table}, rowid, {columns}) "
+            "VALUES ('delete', old.{pk}, {old_columns}); "
+            "INSERT INTO {table}(rowid, {columns}) VALUES (new.{pk}, {new_columns}); "
+            "END",
+            "INSERT INTO {table}({table}) VALUES ('rebuild')",
+        ]
+        return [statement.format(**context) for statement in statements]
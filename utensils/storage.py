@@ -1,3 +1,6 @@
+import hashlib
+import threading
+
 from django.conf import settings
 
 from storages.backends.s3boto import S3BotoStorage
@@ -30,5 +33,74 @@ Example settings config:
   STATICFILES_STORAGE = 'utensils.storage.StaticRootS3BotoStorage'
   DEFAULT_FILE_STORAGE = 'utensils.storage.MediaRootS3BotoStorage'
 """
-StaticRootS3BotoStorage = lambda: S3BotoStorage(**settings.AWS["STATIC"])
-MediaRootS3BotoStorage = lambda: S3BotoStorage(**settings.AWS["MEDIA"])
+
+# Connections and buckets shared by every storage in the process.
+_connections = {}
+_buckets = {}
+_lock = threading.Lock()
+
+
+class SharedS3BotoStorage(S3BotoStorage):
+    """
+    S3BotoStorage that shares one connection (and so boto's pool of HTTP
+    connections) and bucket between all instances with the same
+    credentials, rather than connecting and looking up the bucket again for
+    every storage created.
+    """
+
+    def _connection_key(self):
+        return (self.access_key, self.secret_key, type(self.calling_format))
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            key = self._connection_key()
+            with _lock:
+                if key not in _connections:
+                    _connections[key] = self.connection_class(
+                        self.access_key,
+                        self.secret_key,
+                        calling_format=self.calling_format,
+                    )
+            self._connection = _connections[key]
+        return self._connection
+
+    @property
+    def bucket(self):
+        if self._bucket is None:
+            key = self._connection_key() + (self.bucket_name,)
+            # Connect first, as the lock isn't reentrant.
+            self.connection
+            with _lock:
+                if key not in _buckets:
+                    _buckets[key] = self._get_or_create_bucket(self.bucket_name)
+            self._bucket = _buckets[key]
+        return self._bucket
+
+    def etag_matches(self, name, local_path):
+        """
+        Returns True if the file stored as `name` has the same content as the
+        local file, by comparing its ETag with the local file's MD5. Files
+        uploaded in parts (or gzipped by the storage) never match.
+        """
+        name = self._normalize_name(self._clean_name(name))
+        key = self.entries.get(name) if self.preload_metadata else None
+        if key is None:
+            key = self.bucket.get_key(self._encode_name(name))
+        if key is None or not key.etag:
+            return False
+        md5 = hashlib.md5()
+        with open(local_path, "rb") as local_file:
+            for chunk in iter(lambda: local_file.read(64 * 1024), b""):
+                md5.update(chunk)
+        return key.etag.strip('"') == md5.hexdigest()
+
+
+class StaticRootS3BotoStorage(SharedS3BotoStorage):
+    def __init__(self, **kwargs):
+        super().__init__(**dict(settings.AWS["STATIC"], **kwargs))
+
+
+class MediaRootS3BotoStorage(SharedS3BotoStorage):
+    def __init__(self, **kwargs):
+        super().__init__(**dict(settings.AWS["MEDIA"], **kwargs))
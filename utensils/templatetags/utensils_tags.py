@@ -1,7 +1,8 @@
 from django import template
-from django.http import QueryDict
 
 from .. import utils
+from ..instrumentation import instrument
+from ..paginator import KeysetPaginator
 
 
 register = template.Library()
@@ -23,8 +24,31 @@ def verbose_name_plural(obj):
     return obj._meta.verbose_name_plural
 
 
+def query_builder(request):
+    """
+    Returns a QueryStringBuilder for the request's GET parameters, created
+    once per request and shared by every link rendered for it.
+    """
+    builder = getattr(request, "_utensils_query_builder", None)
+    if builder is None:
+        builder = utils.QueryStringBuilder(request.GET)
+        request._utensils_query_builder = builder
+    return builder
+
+
 @register.inclusion_tag("utensils/_order_by_controls.html", takes_context=True)
 def order_by(context, field_name):
+    with instrument(context.get("request"), "order_by_tag"):
+        return order_by_data(context, field_name)
+
+
+def order_by_data(context, field_name):
+    builder = query_builder(context["request"])
+    params = {
+        "page": getattr(context.get("page_obj"), "number", None),
+        "per-page": getattr(context.get("paginator"), "per_page", None),
+        "sort-col": field_name,
+    }
     return {
         "field_name": field_name,
         "sort_col": context["sort-col"],
@@ -32,13 +56,57 @@ def order_by(context, field_name):
         "sort_dir": context["sort-dir"],
         "page_obj": context.get("page_obj", ""),
         "paginator": context.get("paginator", ""),
+        "asc_url": builder.url(dict(params, **{"sort-dir": "asc"})),
+        "desc_url": builder.url(dict(params, **{"sort-dir": "desc"})),
     }
 
 
 @register.inclusion_tag("utensils/_pagination_controls.html", takes_context=True)
 def pagination(context, adjacent_pages=2):
-    current_page = context["page_obj"].number
-    total_pages = context["paginator"].num_pages
+    with instrument(context.get("request"), "pagination_tag"):
+        return pagination_data(context, adjacent_pages)
+
+
+def pagination_data(context, adjacent_pages):
+    page_obj = context["page_obj"]
+    paginator = context["paginator"]
+    builder = query_builder(context["request"])
+    # Every link keeps the page size and ordering, so build those once.
+    state = {
+        "per-page": paginator.per_page,
+        "sort-col": context.get("sort-col", ""),
+        "sort-dir": context.get("sort-dir", ""),
+    }
+    data = {
+        "object_model": context["view"].model,
+        "page_obj": page_obj,
+        "paginator": paginator,
+        "request": context["request"],
+        "sort_col": context.get("sort-col", ""),
+        "sort_dir": context.get("sort-dir", ""),
+        "pagination_page_sizes": context["pagination_page_sizes"],
+        "current_url": builder.url(),
+        "page_size_links": [
+            (per_page, builder.url(dict(state, page=1, **{"per-page": per_page})))
+            for per_page in context["pagination_page_sizes"]
+        ],
+    }
+
+    if isinstance(paginator, KeysetPaginator):
+        # Cursor based pages have no numbers or totals, only prev/next links.
+        data.update(
+            {
+                "keyset": True,
+                "previous_url": builder.url(
+                    dict(state, cursor=page_obj.previous_cursor)
+                ),
+                "next_url": builder.url(dict(state, cursor=page_obj.next_cursor)),
+            }
+        )
+        return data
+
+    current_page = page_obj.number
+    total_pages = paginator.num_pages
 
     startPage = max(current_page - adjacent_pages, 1)
     if startPage <= 3:
@@ -50,18 +118,55 @@ def pagination(context, adjacent_pages=2):
 
     page_numbers = [n for n in range(startPage, endPage) if n > 0 and n <= total_pages]
 
-    return {
-        "object_model": context["view"].model,
-        "page_obj": context["page_obj"],
-        "paginator": context["paginator"],
-        "request": context["request"],
-        "sort_col": context.get("sort-col", ""),
-        "sort_dir": context.get("sort-dir", ""),
-        "pagination_page_sizes": context["pagination_page_sizes"],
-        "page_numbers": page_numbers,
-        "show_first": 1 not in page_numbers,
-        "show_last": total_pages not in page_numbers,
-    }
+    def page_url(number):
+        return builder.url(dict(state, page=number))
+
+    data.update(
+        {
+            "page_numbers": page_numbers,
+            "page_links": [(n, page_url(n)) for n in page_numbers],
+            "show_first": 1 not in page_numbers,
+            "show_last": total_pages not in page_numbers,
+            "first_url": page_url(1),
+            "last_url": page_url(total_pages),
+        }
+    )
+    if page_obj.has_previous():
+        data["previous_url"] = page_url(page_obj.previous_page_number())
+    if page_obj.has_next():
+        data["next_url"] = page_url(page_obj.next_page_number())
+    return data
+
+
+@register.inclusion_tag("utensils/_facets.html", takes_context=True)
+def facets(context):
+    """
+    Renders the facets added to the context by FacetMixin as links that
+    keep the rest of the query string (but go back to the first page).
+    """
+    builder = query_builder(context["request"])
+    view = context["view"]
+    # Page numbers and cursors don't apply once the filters change.
+    reset = (
+        getattr(view, "page_kwarg", "page"),
+        getattr(view, "cursor_kwarg", "cursor"),
+    )
+    facets = []
+    for facet in context.get("facets", []):
+        options = [
+            {
+                "label": label,
+                "count": count,
+                "selected": facet["active"] and value == facet["value"],
+                "url": builder.url({facet["param"]: value}, remove=reset),
+            }
+            for value, label, count in facet["options"]
+        ]
+        clear_url = None
+        if facet["active"]:
+            clear_url = builder.url(remove=reset + (facet["param"],))
+        facets.append(dict(facet, options=options, clear_url=clear_url))
+    return {"facets": facets}
 
 
 class FilterQuery(template.Node):
@@ -70,17 +175,13 @@ class FilterQuery(template.Node):
         self.request = template.Variable("request")
 
     def render(self, context):
-        req = self.request.resolve(context).GET.dict()
-        params = QueryDict("", mutable=True)
+        params = {}
         for k in self.varlist.keys():
             try:
-                v = self.varlist[k].resolve(context)
-                if v:
-                    req.update({k: v})
+                params[k] = self.varlist[k].resolve(context)
             except:
                 pass
-        params.update(req)
-        return "?" + params.urlencode()
+        return query_builder(self.request.resolve(context)).url(params)
 
 
 def pairwise(varlist):
@@ -1,10 +1,16 @@
 import calendar
 import datetime
 import os
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 def get_env_variable(var_name):
     """
@@ -45,13 +51,156 @@ def months_between(start, end):
     dates = [
         datetime.datetime(year=yr, month=mn, day=1)
         for (yr, mn) in (
-            ((m - 1) / 12 + start.year, (m - 1) % 12 + 1)
+            ((m - 1) // 12 + start.year, (m - 1) % 12 + 1)
             for m in range(start_month, end_months)
         )
     ]
     return dates
 
 
+def _month_index(value):
+    return value.year * 12 + value.month - 1
+
+
+def _localize(value, tzinfo):
+    """
+    Attaches the timezone to a naive datetime, using pytz's localize() so
+    the offset is right for that date.
+    """
+    if tzinfo is None:
+        return value
+    if hasattr(tzinfo, "localize"):
+        return tzinfo.localize(value)
+    return value.replace(tzinfo=tzinfo)
+
+
+DATE_RANGE_UNITS = {
+    "day": datetime.timedelta(days=1),
+    "week": datetime.timedelta(weeks=1),
+    "month": None,
+}
+
+
+def date_range(start, end, unit="day", step=1, inclusive=True):
+    """
+    Lazily yields dates (or datetimes) from start to end every `step` days,
+    weeks or months. Months are counted from the first day of start's month,
+    like months_between(). The end is included if a step lands on it, unless
+    `inclusive` is False.
+
+    Aware datetimes stay in start's timezone, keeping the same wall clock
+    time across daylight saving changes.
+    """
+    if unit not in DATE_RANGE_UNITS:
+        raise ValueError("unit must be one of {}.".format(", ".join(DATE_RANGE_UNITS)))
+    if step < 1:
+        raise ValueError("step must be a positive number.")
+    tzinfo = getattr(start, "tzinfo", None)
+    if tzinfo is not None:
+        start = start.replace(tzinfo=None)
+    first_month = _month_index(start)
+    n = 0
+    while True:
+        if unit == "month":
+            year, month = divmod(first_month + n * step, 12)
+            value = start.replace(year=year, month=month + 1, day=1)
+        else:
+            value = start + DATE_RANGE_UNITS[unit] * n * step
+        value = _localize(value, tzinfo)
+        if value > end or (value == end and not inclusive):
+            return
+        yield value
+        n += 1
+
+
+class MonthRange:
+    """
+    The first day of each month from start's month to end's month
+    (inclusive), like months_between() but without building a list.
+
+    Behaves like a range(): len(), indexing, slicing and `in` are O(1), and
+    index() finds the month a date falls in, so timestamps can be bucketed
+    without searching:
+
+        months = MonthRange(datetime.date(2015, 1, 1), datetime.date(2015, 12, 1))
+        counts = [0] * len(months)
+        for created in Book.objects.values_list("created", flat=True):
+            counts[months.index(created)] += 1
+
+    Months are datetimes at midnight in `tzinfo` (by default start's
+    timezone, if any), and aware datetimes are converted to it before
+    finding their month.
+    """
+
+    def __init__(self, start, end, step=1, tzinfo=None):
+        if tzinfo is None:
+            tzinfo = getattr(start, "tzinfo", None)
+        self.tzinfo = tzinfo
+        self.months = range(_month_index(start), _month_index(end) + 1, step)
+
+    @classmethod
+    def _from_months(cls, months, tzinfo):
+        month_range = cls.__new__(cls)
+        month_range.tzinfo = tzinfo
+        month_range.months = months
+        return month_range
+
+    def _month(self, index):
+        year, month = divmod(index, 12)
+        return _localize(datetime.datetime(year, month + 1, 1), self.tzinfo)
+
+    def _index_of(self, value):
+        tzinfo = getattr(value, "tzinfo", None)
+        if tzinfo is not None and self.tzinfo is not None:
+            value = value.astimezone(self.tzinfo)
+        return _month_index(value)
+
+    def __len__(self):
+        return len(self.months)
+
+    def __iter__(self):
+        return (self._month(index) for index in self.months)
+
+    def __reversed__(self):
+        return (self._month(index) for index in reversed(self.months))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._from_months(self.months[key], self.tzinfo)
+        return self._month(self.months[key])
+
+    def _covers(self, index):
+        months = self.months
+        return index in range(months.start, months.stop, 1 if months.step > 0 else -1)
+
+    def __contains__(self, value):
+        return self._covers(self._index_of(value))
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, MonthRange)
+            and self.months == other.months
+            and self.tzinfo == other.tzinfo
+        )
+
+    def __repr__(self):
+        if not self.months:
+            return "<MonthRange: empty>"
+        return "<MonthRange: {:%Y-%m} to {:%Y-%m}>".format(self[0], self[-1])
+
+    def index(self, value):
+        """
+        Returns the position of the month containing the date or datetime,
+        or with a `step`, of the month starting the period it falls in.
+        Raises ValueError if it isn't in the range.
+        """
+        months = self.months
+        index = self._index_of(value)
+        if not self._covers(index):
+            raise ValueError("{} is not in {!r}".format(value, self))
+        return (index - months.start) // months.step
+
+
 def previous_month(year, month):
     """
     Returns a tuple of the month prior to the year and month provided.
@@ -85,6 +234,40 @@ def remove_query_string(url):
     return url.split("?")[0]
 
 
+class QueryStringBuilder:
+    """
+    Builds query strings that differ from a base QueryDict (usually
+    request.GET) in a few parameters. The base parameters are encoded once
+    so each link only encodes the values that change.
+
+        builder = QueryStringBuilder(request.GET)
+        builder.url({"page": 2, "per-page": 50})  # '?search=foo&page=2&per-page=50'
+
+    Like QueryDict.dict() only the last value of each parameter is kept.
+    Parameters set to a false value are left unchanged, those named in
+    `remove` are left out.
+    """
+
+    def __init__(self, query_dict):
+        self.encoded = dict(
+            (key, urlencode([(key, value)])) for key, value in query_dict.dict().items()
+        )
+        self.keys = list(self.encoded)
+
+    def url(self, params=None, remove=()):
+        params = params or {}
+        changed = dict(
+            (key, urlencode([(key, value)])) for key, value in params.items() if value
+        )
+        pieces = [
+            changed.pop(key, self.encoded[key])
+            for key in self.keys
+            if key not in remove
+        ]
+        pieces.extend(changed[key] for key in params if key in changed)
+        return "?" + "&".join(pieces)
+
+
 def to_unix_timestamp(dt, epoch=datetime.datetime(1970, 1, 1)):
     """
     Return number of seconds since epoch for the given datetime.
@@ -97,3 +280,69 @@ def from_unix_timestamp(ts):
     Return datetime object for the given timestamp.
     """
     return datetime.datetime.fromtimestamp(int(ts))
+
+
+# Batch versions of the date helpers above for reporting over many rows. They
+# take NumPy datetime64 arrays (or any iterable of dates or datetimes) and
+# work on the whole array at once. They need NumPy to be installed.
+
+
+def _datetime64(values, unit):
+    if np is None:
+        raise ImproperlyConfigured("The batch date helpers require NumPy.")
+    if not isinstance(values, (np.ndarray, list, tuple)):
+        # NumPy can't build an array from a generator.
+        values = list(values)
+    return np.asarray(values, dtype="datetime64[{}]".format(unit))
+
+
+def _months(dates):
+    return _datetime64(dates, "M")
+
+
+def month_starts(dates):
+    """
+    Returns a datetime64[D] array of the first day of each date's month.
+    """
+    return _months(dates).astype("datetime64[D]")
+
+
+def num_months_between_array(starts, ends):
+    """
+    Returns an array of the number of months between each pair of dates,
+    ignoring the day of month like num_months_between().
+    """
+    return (_months(ends) - _months(starts)).astype(np.int64)
+
+
+def last_day_of_month_array(dates):
+    """
+    Returns an array of the last day of each date's month.
+    """
+    months = _months(dates)
+    days = (months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")
+    return days.astype(np.int64)
+
+
+def previous_month_array(dates):
+    """
+    Returns a datetime64[D] array of the first day of the previous month.
+    """
+    return (_months(dates) - 1).astype("datetime64[D]")
+
+
+def next_month_array(dates):
+    """
+    Returns a datetime64[D] array of the first day of the following month.
+    """
+    return (_months(dates) + 1).astype("datetime64[D]")
+
+
+def to_unix_timestamp_array(dts, epoch=datetime.datetime(1970, 1, 1)):
+    """
+    Returns an array of the number of seconds since epoch for each datetime,
+    truncating any fraction of a second towards zero like to_unix_timestamp().
+    """
+    microseconds = _datetime64(dts, "us") - np.datetime64(epoch, "us")
+    microseconds = microseconds.astype(np.int64)
+    return np.sign(microseconds) * (np.abs(microseconds) // 1000000)
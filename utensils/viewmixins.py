@@ -1,14 +1,32 @@
-from functools import reduce
-import operator
-from urllib.parse import urlsplit
+import hashlib
+from urllib.parse import urlencode, urlsplit
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.views import redirect_to_login
 from django.core.urlresolvers import resolve, Resolver404
-from django.db.models import Q
-from django.core.exceptions import ImproperlyConfigured, PermissionDenied
-from django.http import HttpResponseRedirect
+from django.core.cache import caches
+from django.core.exceptions import (
+    FieldDoesNotExist,
+    ImproperlyConfigured,
+    PermissionDenied,
+    ValidationError,
+)
+from django.core.paginator import Page
+from django.db.models import Count, DateTimeField, Max
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseBadRequest,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.views.decorators.http import condition
 
 from braces.views import StaffuserRequiredMixin
 
@@ -17,7 +35,27 @@ try:
 except ImportError:
     from braces.views import AccessMixin
 
+from .cache import (
+    get_cached_permissions,
+    get_generations,
+    invalidate_list_cache,
+    register_list_models,
+)
+from .checks import _resolve_field
+from .context_processors import pagination
+from .export import EXPORT_FORMATS, export_rows
+from .facets import facet_counts
 from .forms import SearchForm
+from .instrumentation import InstrumentedTemplateResponse, instrument
+from .paginator import (
+    ExactCount,
+    InvalidCursor,
+    KeysetPage,
+    KeysetPaginator,
+    Paginator,
+)
+from .search import IContainsSearchBackend, spans_multi_valued_relation
+from .utils import QueryStringBuilder
 
 
 class MessageMixin:
@@ -61,9 +99,26 @@ class MessageMixin:
         return super().formset_invalid(form)
 
     def set_value(self, request, *args, **kwargs):
-        if not self.request.is_ajax() and hasattr(self, "success_message"):
-            messages.success(self.request, self.success_message)
-        return super().set_value(request, *args, **kwargs)
+        response = super().set_value(request, *args, **kwargs)
+        # Rejected requests (400, 412) have nothing to report.
+        if response.status_code < 400 and not self.request.is_ajax():
+            if getattr(self, "value_conflict", False):
+                if hasattr(self, "error_message"):
+                    messages.error(self.request, self.error_message)
+            elif hasattr(self, "success_message"):
+                messages.success(self.request, self.success_message)
+        return response
+
+    def set_values(self, request, *args, **kwargs):
+        # The messages can use the {updated} and {skipped} counts.
+        response = super().set_values(request, *args, **kwargs)
+        summary = self.set_values_summary
+        if summary is not None and not self.request.is_ajax():
+            if summary["updated"] and hasattr(self, "success_message"):
+                messages.success(self.request, self.success_message.format(**summary))
+            if summary["skipped"] and hasattr(self, "error_message"):
+                messages.error(self.request, self.error_message.format(**summary))
+        return response
 
 
 class PermissionRequiredMixin(AccessMixin):
@@ -74,10 +129,15 @@ class PermissionRequiredMixin(AccessMixin):
     permission.
 
     Class Settings
-    `permission_required` - the permission to check for or False to skip check
+    `permission_required` - the permission to check for or False to skip
+        check. Can also be a list of permissions, all of which are required,
+        or a dict with "all" and/or "any" lists
     `login_url` - the login url of site
     `redirect_field_name` - defaults to "next"
     `raise_exception` - defaults to False - raise 403 if set to True
+    `cache_permissions` - defaults to False - cache each user's permissions
+        between requests (see utensils.cache.get_cached_permissions)
+    `permission_cache_timeout` - defaults to 300 seconds
 
     Example Usage
 
@@ -91,9 +151,54 @@ class PermissionRequiredMixin(AccessMixin):
             redirect_field_name = "hollaback"
             raise_exception = True
             ...
+
+        permission_required = ["app.add_thing", "app.change_thing"]
+        permission_required = {
+            "all": ["app.change_thing"],
+            "any": ["app.publish_thing", "app.review_thing"],
+        }
     """
 
     permission_required = None  # Default required perms to none
+    cache_permissions = False
+    permission_cache_timeout = 300
+
+    def get_permission_required(self):
+        """
+        Returns a tuple of the permissions that are all required and those
+        of which any one is required.
+        """
+        perms = self.permission_required
+        if isinstance(perms, str):
+            return [perms], []
+        if isinstance(perms, dict):
+            all_perms, any_perms = list(perms.get("all", [])), list(
+                perms.get("any", [])
+            )
+        else:
+            all_perms, any_perms = list(perms), []
+        # Checking nothing would let everyone in.
+        if not all_perms and not any_perms:
+            raise ImproperlyConfigured(
+                "'PermissionRequiredMixin' requires at least one permission in "
+                "'permission_required', or False to skip the check."
+            )
+        return all_perms, any_perms
+
+    def check_permissions(self, user):
+        all_perms, any_perms = self.get_permission_required()
+        if self.cache_permissions and user.is_authenticated():
+            perms = get_cached_permissions(user, self.permission_cache_timeout)
+
+            def has_perm(perm):
+                return user.is_active and (user.is_superuser or perm in perms)
+
+        else:
+            has_perm = user.has_perm
+
+        if not all(has_perm(perm) for perm in all_perms):
+            return False
+        return not any_perms or any(has_perm(perm) for perm in any_perms)
 
     def dispatch(self, request, *args, **kwargs):
         # Make sure that the permission_required attribute is set on the
@@ -105,8 +210,8 @@ class PermissionRequiredMixin(AccessMixin):
             )
 
         if self.permission_required is not False:
-            # Check to see if the request's user has the required permission.
-            has_permission = request.user.has_perm(self.permission_required)
+            # Check to see if the request's user has the required permissions.
+            has_permission = self.check_permissions(request.user)
 
             if not has_permission:  # If the user lacks the permission
                 if self.raise_exception:  # *and* if an exception was desired
@@ -145,8 +250,55 @@ class StaffViewMixin(
 class PaginateMixin:
     """
     Adds page size support to a ListView.
+
+    Set `paginate_keyset = True` to page through the list with cursors (see
+    `utensils.paginator.KeysetPaginator`) instead of page numbers. This
+    avoids OFFSET and COUNT(*) queries on large tables; pages are ordered by
+    the OrderByMixin sort column (if any) with the primary key as a
+    tiebreaker.
     """
 
+    paginate_keyset = False
+    cursor_kwarg = "cursor"
+    paginator_class = Paginator
+    count_strategy = None
+
+    def get_count_strategy(self):
+        """
+        Returns the strategy used to count the rows (see
+        `utensils.paginator`), by default an exact COUNT(*).
+        """
+        return self.count_strategy or ExactCount()
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        kwargs.setdefault("count_strategy", self.get_count_strategy())
+        return super().get_paginator(queryset, per_page, **kwargs)
+
+    def get_keyset_ordering(self):
+        get_order_by = getattr(self, "get_order_by", None)
+        ordering = list(get_order_by()) if get_order_by else []
+        if not any(field.lstrip("-") in ("pk", "id") for field in ordering):
+            desc = ordering and ordering[0].startswith("-")
+            ordering.append("-pk" if desc else "pk")
+        return ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.paginate_keyset:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            self.get_keyset_ordering(),
+            count_strategy=self.get_count_strategy(),
+        )
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        try:
+            page = paginator.page(cursor)
+        except InvalidCursor as e:
+            raise Http404("Invalid cursor: {}".format(e))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_paginate_by(self, *args, **kwargs):
         try:
             paginate_by = self.request.GET["per-page"]
@@ -162,16 +314,71 @@ class PaginateMixin:
 class OrderByMixin:
     """
     Add support for ordering the queryset in your ListView.
+
+    `orderable_fields` lists the sort columns a user may choose, either as a
+    list of field names or a dict mapping the `sort-col` value to a field or
+    list of fields to order by. If not set any of the model's own fields can
+    be used. Several columns can be sorted on at once by separating them
+    (and their directions) with commas. The primary key is added as a final
+    tiebreaker so pages are stable.
+
+        orderable_fields = {
+            "title": "title",
+            "author": ["author__last_name", "author__first_name"],
+        }
     """
 
+    orderable_fields = None
+
+    def get_orderable_fields(self, model=None):
+        """
+        Returns a dict mapping each allowed sort column to a list of fields.
+        `model` is the model of the queryset being ordered, by default that
+        of get_queryset().
+        """
+        fields = self.orderable_fields
+        if fields is None:
+            if model is None:
+                model = self.get_queryset().model
+            fields = [field.name for field in model._meta.concrete_fields]
+        if not isinstance(fields, dict):
+            fields = dict((name, name) for name in fields)
+        return dict(
+            (col, [value] if isinstance(value, str) else list(value))
+            for col, value in fields.items()
+        )
+
+    def get_order_by(self, model=None):
+        """
+        Returns the list of fields the queryset is ordered by from the
+        request, or an empty list if no sort column was requested.
+
+        Sort columns that aren't allowed are ignored.
+        """
+        sort_cols = self.request.GET.get("sort-col", "").split(",")
+        sort_dirs = self.request.GET.get("sort-dir", "").split(",")
+        orderable_fields = self.get_orderable_fields(model)
+        order_by = []
+        for i, sort_col in enumerate(sort_cols):
+            if sort_col not in orderable_fields:
+                continue
+            # Columns without their own direction use the last one given.
+            desc = sort_dirs[min(i, len(sort_dirs) - 1)] == "desc"
+            for field in orderable_fields[sort_col]:
+                if desc:
+                    field = field[1:] if field.startswith("-") else "-" + field
+                order_by.append(field)
+        if order_by and not any(f.lstrip("-") in ("pk", "id") for f in order_by):
+            order_by.append("-pk" if order_by[0].startswith("-") else "pk")
+        return order_by
+
     def get_queryset(self):
+        # Only build up the query here, evaluating it (even with `if qs`)
+        # would fetch every row before the paginator gets to slice it.
         qs = super(OrderByMixin, self).get_queryset()
-        if qs:
-            sort_col = self.request.GET.get("sort-col")
-            sort_dir = self.request.GET.get("sort-dir", "")
-            if sort_col:
-                order_by = "%s%s" % ("-" if sort_dir == "desc" else "", sort_col)
-                qs = qs.order_by(order_by)
+        order_by = self.get_order_by(qs.model)
+        if order_by:
+            qs = qs.order_by(*order_by)
         return qs
 
     def get_context_data(self, **kwargs):
@@ -185,6 +392,204 @@ class OrderByMixin:
         return context_data
 
 
+def related_lookups(model, paths):
+    """
+    Returns the (select_related, prefetch_related, only) lookups needed to
+    load the fields at the end of each path (e.g. 'author__last_name')
+    without further queries. `only` is None if the columns can't be pruned
+    because a path ends on a related object or on something other than a
+    field, such as a property.
+    """
+    select, prefetch, only = set(), set(), set()
+    prune = True
+    for path in paths:
+        opts = model._meta
+        relations = []
+        many = False
+        for name in path.lstrip("-").split("__"):
+            try:
+                field = opts.pk if name == "pk" else opts.get_field(name)
+            except FieldDoesNotExist:
+                prune = False
+                break
+            if not field.is_relation:
+                if not many:
+                    only.add("__".join(relations + [field.name]))
+                break
+            if field.many_to_many or field.one_to_many:
+                if not many and relations:
+                    select.add("__".join(relations))
+                many = True
+            elif field.concrete and not many:
+                only.add("__".join(relations + [name]))
+            if many and field.auto_created and not field.concrete:
+                # Reverse relations are prefetched by accessor, e.g. book_set.
+                name = field.get_accessor_name()
+            relations.append(name)
+            opts = field.related_model._meta
+        else:
+            # The path ends on a related object which is needed whole.
+            prune = False
+        if relations:
+            (prefetch if many else select).add("__".join(relations))
+    return (
+        sorted(select),
+        sorted(prefetch),
+        sorted(only) if prune else None,
+    )
+
+
+class RelatedFieldsMixin:
+    """
+    Loads the related objects (and only the columns) a ListView shows so a
+    page takes the same number of queries however many rows it has.
+
+    `list_fields` lists the field paths shown for each row. Foreign keys on
+    the way are followed with select_related(), reverse foreign keys and
+    many to many relations with prefetch_related() and every other column
+    is deferred with only().
+
+        list_fields = ["title", "author__last_name", "in_stock"]
+
+    `related_fields` lists relations to load whole, without pruning any
+    columns. If neither is set the foreign keys used by `search_fields` and
+    the sort columns are selected, as they are usually shown as well.
+    """
+
+    list_fields = None
+    related_fields = None
+
+    def get_list_fields(self):
+        return self.list_fields
+
+    def get_related_fields(self, model=None):
+        """
+        Returns the relations to load whole. `model` is the model of the
+        queryset being loaded, by default that of get_queryset().
+        """
+        if self.related_fields is not None:
+            return self.related_fields
+        if self.get_list_fields() is not None:
+            return []
+        if model is None:
+            model = self.get_queryset().model
+        paths = list(getattr(self, "search_fields", None) or [])
+        get_order_by = getattr(self, "get_order_by", None)
+        if get_order_by:
+            paths += get_order_by(model)
+        # Drop the final field name to leave the relations followed, but
+        # don't guess at prefetching many valued relations.
+        relations = ["__".join(path.lstrip("-").split("__")[:-1]) for path in paths]
+        return [
+            relation
+            for relation in relations
+            if relation and not spans_multi_valued_relation(model, relation)
+        ]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        select, prefetch, only = [], [], None
+        list_fields = self.get_list_fields()
+        if list_fields is not None:
+            # The sort columns are needed too, e.g. by keyset pagination.
+            paths = list(list_fields) + list(qs.model._meta.ordering)
+            get_order_by = getattr(self, "get_order_by", None)
+            if get_order_by:
+                paths += get_order_by(qs.model)
+            select, prefetch, only = related_lookups(
+                qs.model, [path for path in paths if path != "?"]
+            )
+        related_fields = self.get_related_fields(qs.model)
+        if related_fields:
+            related_select, related_prefetch, _ = related_lookups(
+                qs.model, related_fields
+            )
+            select += related_select
+            prefetch += related_prefetch
+        if select:
+            qs = qs.select_related(*select)
+        if prefetch:
+            qs = qs.prefetch_related(*prefetch)
+        if only is not None:
+            qs = qs.only(*only)
+        return qs
+
+
+class FacetMixin:
+    """
+    Filters a ListView by the `facets` chosen in the query string and adds
+    the options for each facet, with how many rows each would give, to the
+    context as `facets` (see `utensils.facets` and the `{% facets %}` tag).
+    All the counts are made with a single query.
+
+        facets = [
+            BooleanFacet("in_stock"),
+            RangeFacet("publication_date", [(None, 1920), (1920, None)]),
+            RelatedFacet("author"),
+        ]
+
+    Must be left of SearchFormMixin so the counts are for the search
+    results.
+    """
+
+    facets = ()
+
+    def get_facets(self):
+        return list(self.facets)
+
+    def get_active_facets(self, queryset):
+        """
+        Returns a dict mapping the param of each facet chosen in the query
+        string to the Q object filtering for it. Invalid choices are ignored.
+        """
+        active = {}
+        for facet in self.get_facets():
+            value = self.request.GET.get(facet.param)
+            if value:
+                q = facet.get_filter(queryset, value)
+                if q is not None:
+                    active[facet.param] = q
+        return active
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        self.facet_queryset = qs
+        self.active_facets = self.get_active_facets(qs)
+        for q in self.active_facets.values():
+            qs = qs.filter(q)
+        return qs
+
+    def get_facet_state(self):
+        """
+        Returns a string identifying the facets chosen, e.g. for cache keys.
+        """
+        return "&".join(
+            "{}={}".format(param, self.request.GET[param])
+            for param in sorted(getattr(self, "active_facets", {}))
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        facets = self.get_facets()
+        # PJAX fragments (see PjaxMixin) don't show the facets.
+        is_fragment_request = getattr(self, "is_fragment_request", None)
+        if facets and not (is_fragment_request and is_fragment_request()):
+            model = self.facet_queryset.model
+            context["facets"] = [
+                {
+                    "param": facet.param,
+                    "label": facet.get_label(model),
+                    "value": self.request.GET.get(facet.param, ""),
+                    "active": facet.param in self.active_facets,
+                    "options": options,
+                }
+                for facet, options in facet_counts(
+                    self.facet_queryset, facets, self.active_facets
+                )
+            ]
+        return context
+
+
 class SearchFormMixin:
     """
     Present a form element to filter a ListView, this class reimplements
@@ -194,8 +599,18 @@ class SearchFormMixin:
     search_form = None
     search_form_class = SearchForm
     search_filter = None
+    search_queryset = None
+    search_backend = None
+    search_fallback = True
     initial = {}
 
+    def get_search_backend(self):
+        """
+        Returns the backend used to filter the queryset (see
+        `utensils.search`), by default the icontains backend.
+        """
+        return self.search_backend or IContainsSearchBackend()
+
     def get_initial(self):
         return self.initial.copy()
 
@@ -214,30 +629,42 @@ class SearchFormMixin:
     def get_queryset(self):
         # First handle any other processing that must be done
         qs = super().get_queryset()
-        if qs and self.search_filter:
-            # If we have a queryset and a filter to apply to it, build a list
-            # of fields to search and what to search them with.
-            predicates = [
-                (k + "__" + self.search_fields[k], self.search_filter)
-                for k in self.search_fields.keys()
-            ]
-            # Build that into a list of Q filter objects
-            qsfilter = [Q(x) for x in predicates]
-            # Join them together with the or operator and pass them to filter
-            newqs = qs.filter(reduce(operator.or_, qsfilter)).distinct()
-            # If we get any items back, the search worked
-            count = newqs.count()
-            if count > 0:
+        if self.search_filter and getattr(self, "search_fields", None):
+            # If we have a filter to apply to the queryset, let the search
+            # backend filter it using our search fields.
+            newqs = self.get_search_backend().filter(
+                qs, self.search_fields, self.search_filter
+            )
+            # If we get any items back, the search worked. The number found is
+            # added to the messages once the paginator has counted them.
+            if newqs.exists():
                 qs = newqs
-                messages.success(self.search_request, str(count) + " item(s) found.")
+                self.search_queryset = newqs
             else:
                 messages.warning(self.search_request, "Search returned no results.")
+                # Unless told not to, show everything rather than nothing.
+                if not self.search_fallback:
+                    qs = newqs
         return qs
 
+    def get_search_count(self, context):
+        """
+        Returns the number of search results, reusing the paginator's count
+        (and so its count strategy) rather than counting again.
+        """
+        paginator = context.get("paginator")
+        if paginator is not None:
+            return paginator.count
+        return self.search_queryset.count()
+
     def get_context_data(self, **kwargs):
         # Add the search form to the page
         kwargs["search_form"] = self.search_form
-        return super().get_context_data(**kwargs)
+        context = super().get_context_data(**kwargs)
+        if self.search_queryset is not None:
+            count = self.get_search_count(context)
+            messages.success(self.search_request, str(count) + " item(s) found.")
+        return context
 
     def get(self, request, *args, **kwargs):
         self.search_form = self.make_form(request)
@@ -254,13 +681,431 @@ class SearchFormMixin:
         return super().post(request, *args, **kwargs)
 
 
+class ExportMixin:
+    """
+    Streams the whole searched and sorted list as CSV or newline delimited
+    JSON when requested with `?export=csv` or `?export=ndjson`, keeping
+    memory use flat however many rows there are (see `utensils.export`).
+
+    `export_fields` lists the columns, as field paths or (heading, path)
+    tuples. Exports are disabled unless it is set.
+
+        export_fields = ["title", ("author", "author__last_name"), "in_stock"]
+    """
+
+    export_fields = None
+    export_kwarg = "export"
+    export_chunk_size = 2000
+    export_filename = None
+
+    def get_export_fields(self):
+        """
+        Returns a list of (heading, path) tuples.
+        """
+        return [
+            (field, field) if isinstance(field, str) else tuple(field)
+            for field in self.export_fields or []
+        ]
+
+    def get_export_ordering(self):
+        get_keyset_ordering = getattr(self, "get_keyset_ordering", None)
+        if get_keyset_ordering:
+            return get_keyset_ordering()
+        return PaginateMixin.get_keyset_ordering(self)
+
+    def get_export_filename(self, export_format, model=None):
+        """
+        Returns the file name, by default the exported queryset's model name.
+        """
+        if self.export_filename:
+            return "{}.{}".format(self.export_filename, export_format)
+        if model is None:
+            model = self.get_queryset().model
+        opts = model._meta
+        return "{}.{}".format(opts.model_name, export_format)
+
+    def export(self, export_format):
+        # Export nothing rather than everything when a search finds nothing.
+        self.search_fallback = False
+        headings, fields = zip(*self.get_export_fields())
+        queryset = self.get_queryset()
+        rows = export_rows(
+            queryset,
+            fields,
+            self.get_export_ordering(),
+            chunk_size=self.export_chunk_size,
+        )
+        content_type, lines = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(lines(headings, rows), content_type)
+        response["Content-Disposition"] = 'attachment; filename="{}"'.format(
+            self.get_export_filename(export_format, queryset.model)
+        )
+        return response
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_kwarg)
+        if self.export_fields and export_format in EXPORT_FORMATS:
+            return self.export(export_format)
+        return super().get(request, *args, **kwargs)
+
+
+class PjaxMixin:
+    """
+    Renders only the table and pagination (`fragment_template_name`, by
+    default "<app>/<model>_list_fragment.html") for PJAX requests, i.e. those
+    with an X-PJAX header or a `_pjax` parameter. The fragment is rendered
+    without context processors, with the request and pagination sizes the
+    list tags need added to the view's context. Facets aren't counted.
+
+    Set `conditional_get = True` to also answer conditional GETs: the ETag
+    and Last-Modified headers come from the newest `modified` timestamp (see
+    TimeStampedModel) and the number of rows of the searched and filtered
+    list, found with one aggregate query, so an unchanged page is a 304
+    without fetching or rendering it. The paginator reuses that count
+    rather than running its own COUNT(*) when it would count exactly, but
+    keyset pagination and other count strategies gain a query. Models
+    without the field are always rendered. Pages with messages to show are
+    never 304s.
+    """
+
+    fragment_template_name = None
+    pjax_param = "_pjax"
+    conditional_get = False
+    modified_field_name = "modified"
+    list_count = None
+
+    def is_fragment_request(self):
+        return bool(
+            self.request.META.get("HTTP_X_PJAX") or self.pjax_param in self.request.GET
+        )
+
+    def get_fragment_template_names(self):
+        if self.fragment_template_name:
+            return [self.fragment_template_name]
+        opts = self.object_list.model._meta
+        return [
+            "{}/{}{}_fragment.html".format(
+                opts.app_label, opts.model_name, self.template_name_suffix
+            )
+        ]
+
+    def get_list_validators(self, queryset):
+        """
+        Returns the (ETag, Last-Modified) of the list, or (None, None) if the
+        page can't be cached.
+        """
+        field = self.modified_field_name
+        if not self.conditional_get or not field:
+            return None, None
+        if _resolve_field(queryset.model, field) is None:
+            return None, None
+        # Anything queued (e.g. by the search) would be lost with a 304.
+        if len(messages.get_messages(self.request)):
+            return None, None
+        data = queryset.order_by().aggregate(latest=Max(field), count=Count("pk"))
+        self.list_count = data["count"]
+        user = getattr(self.request, "user", None)
+        parts = [
+            str(data["latest"]),
+            str(data["count"]),
+            self.request.get_full_path(),
+            str(self.is_fragment_request()),
+            str(getattr(user, "pk", None)),
+        ]
+        etag = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+        return etag, data["latest"]
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # Don't count again what the validators just counted.
+        count_strategy = getattr(paginator, "count_strategy", None)
+        if self.list_count is not None and type(count_strategy) is ExactCount:
+            paginator.count = self.list_count
+        return paginator
+
+    def render_fragment(self, context):
+        # Links in the fragment shouldn't ask for another fragment.
+        query = self.request.GET.copy()
+        query.pop(self.pjax_param, None)
+        self.request._utensils_query_builder = QueryStringBuilder(query)
+        context["request"] = self.request
+        context.update(pagination(self.request))
+        with instrument(self.request, "render"):
+            content = render_to_string(self.get_fragment_template_names(), context)
+        return HttpResponse(content)
+
+    def render_list(self, request, *args, **kwargs):
+        # As ListView.get(), reusing the queryset the validators came from.
+        if not self.get_allow_empty() and not self.object_list.exists():
+            raise Http404(
+                "Empty list and '{}.allow_empty' is False.".format(
+                    self.__class__.__name__
+                )
+            )
+        context = self.get_context_data()
+        if self.is_fragment_request():
+            return self.render_fragment(context)
+        return self.render_to_response(context)
+
+    def get(self, request, *args, **kwargs):
+        self.object_list = self.get_queryset()
+        etag, last_modified = self.get_list_validators(self.object_list)
+        view = self.render_list
+        if etag is not None:
+            view = condition(
+                etag_func=lambda *args, **kwargs: etag,
+                last_modified_func=lambda *args, **kwargs: last_modified,
+            )(view)
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ["X-PJAX"])
+        return response
+
+
+class CachedListMixin:
+    """
+    Caches the primary keys (and count) of each page of a paginated ListView
+    so repeat requests skip the search, ordering and count queries and fetch
+    the page's objects by primary key.
+
+    Must be left of BaseListView (or PaginateMixin). Entries are keyed on the
+    path, URL arguments and query string, the page size, the user's
+    permissions and the model's generation counter (see `utensils.cache`),
+    which is bumped when an instance is saved or deleted. List any other
+    models the ordering or search depend on in `cache_dependencies`.
+
+    Class settings
+    `cache_timeout` - seconds to keep a page for, defaults to 300
+    `cache_alias` - the cache to use, defaults to "default"
+    `cache_dependencies` - other models whose changes invalidate the list
+    """
+
+    cache_timeout = 300
+    cache_alias = "default"
+    cache_dependencies = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Watch the models when the URLconf is loaded, so any process that
+        # saves them (not only those that have served the list) bumps the
+        # generations.
+        model = initkwargs.get("model", cls.model)
+        queryset = initkwargs.get("queryset", cls.queryset)
+        if model is None and queryset is not None:
+            model = queryset.model
+        if model is not None:
+            register_list_models(
+                [model]
+                + list(initkwargs.get("cache_dependencies", cls.cache_dependencies)),
+                initkwargs.get("cache_alias", cls.cache_alias),
+            )
+        return super().as_view(**initkwargs)
+
+    def get_cache_scope(self):
+        """
+        Returns a string identifying which users can share cached pages, by
+        default users with the same permissions.
+        """
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_authenticated():
+            return "anonymous"
+        if user.is_superuser:
+            return "superuser"
+        return ",".join(sorted(get_cached_permissions(user)))
+
+    def get_cache_query(self):
+        """
+        Returns the query string, sorted, without the page and cursor.
+        """
+        ignore = (self.page_kwarg, getattr(self, "cursor_kwarg", "cursor"))
+        return urlencode(
+            sorted(
+                (key, value)
+                for key, values in self.request.GET.lists()
+                if key not in ignore
+                for value in values
+            )
+        )
+
+    def get_cache_key(self, queryset, page_size):
+        get = self.request.GET
+        get_order_by = getattr(self, "get_order_by", None)
+        get_facet_state = getattr(self, "get_facet_state", None)
+        search = getattr(self, "search_filter", None) or ""
+        models = [queryset.model] + list(self.cache_dependencies)
+        # For views whose model is only known from get_queryset().
+        register_list_models(models, self.cache_alias)
+        parts = [
+            "{}.{}".format(self.__class__.__module__, self.__class__.__name__),
+            self.request.path,
+            repr(self.args),
+            repr(sorted(self.kwargs.items())),
+            self.get_cache_query(),
+            search.strip(),
+            ",".join(get_order_by(queryset.model) if get_order_by else []),
+            get.get(self.page_kwarg, "1"),
+            get.get(getattr(self, "cursor_kwarg", "cursor"), ""),
+            get_facet_state() if get_facet_state else "",
+            str(page_size),
+            self.get_cache_scope(),
+        ] + [str(g) for g in get_generations(models, self.cache_alias)]
+        digest = hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+        return "utensils-list:{}".format(digest)
+
+    def get_cached_objects(self, queryset, pks):
+        objects = queryset.in_bulk(pks)
+        return [objects[pk] for pk in pks if pk in objects]
+
+    def paginate_queryset(self, queryset, page_size):
+        cache = caches[self.cache_alias]
+        key = self.get_cache_key(queryset, page_size)
+        cached = cache.get(key)
+        if cached is not None:
+            return self.paginate_cached(queryset, page_size, cached)
+
+        paginator, page, object_list, is_paginated = super().paginate_queryset(
+            queryset, page_size
+        )
+        cached = {
+            "pks": [obj.pk for obj in page.object_list],
+            "count": paginator.count if page.number is not None else None,
+            "number": page.number,
+            "has_next": page.has_next(),
+            "has_previous": page.has_previous(),
+        }
+        cache.set(key, cached, self.cache_timeout)
+        return (paginator, page, object_list, is_paginated)
+
+    def paginate_cached(self, queryset, page_size, cached):
+        object_list = self.get_cached_objects(queryset, cached["pks"])
+        if cached["number"] is None:
+            # A keyset page, see PaginateMixin.paginate_keyset.
+            paginator = KeysetPaginator(
+                queryset,
+                page_size,
+                self.get_keyset_ordering(),
+                count_strategy=self.get_count_strategy(),
+            )
+            page = KeysetPage(
+                object_list, paginator, cached["has_next"], cached["has_previous"]
+            )
+        else:
+            paginator = self.get_paginator(
+                queryset,
+                page_size,
+                orphans=self.get_paginate_orphans(),
+                allow_empty_first_page=self.get_allow_empty(),
+            )
+            paginator.count = cached["count"]
+            page = Page(object_list, cached["number"], paginator)
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+class InstrumentedViewMixin:
+    """
+    Times the phases of a list view for `InstrumentationMiddleware`:
+    'queryset' (get_queryset, including search), 'paginate' (the count and
+    fetching the page) and 'render' (including the 'pagination_tag' and
+    'order_by_tag' phases). Each phase records its duration and SQL queries.
+
+    Must be left of BaseListView (and CachedListMixin, to time the cached
+    path as well).
+    """
+
+    response_class = InstrumentedTemplateResponse
+
+    def get_queryset(self):
+        with instrument(self.request, "queryset"):
+            return super().get_queryset()
+
+    def paginate_queryset(self, queryset, page_size):
+        with instrument(self.request, "paginate"):
+            result = super().paginate_queryset(queryset, page_size)
+            # Fetch the page here rather than when the template first uses it.
+            len(result[2])
+            return result
+
+
+class ConditionalObjectMixin:
+    """
+    Answers conditional GETs for a view of a single object (i.e. one with
+    get_object(), such as a DetailView or SetModelFieldView). The ETag and
+    Last-Modified headers come from the object's `modified` timestamp (see
+    TimeStampedModel), looked up with values_list() before the object is
+    loaded, so an unchanged page is a 304 after one small query. Models
+    without the field are always rendered, as are pages with messages to
+    show.
+
+    Must be left of the view (e.g. DetailView).
+    """
+
+    modified_field_name = "modified"
+
+    def get_object_modified(self):
+        """
+        Returns the object's `modified` timestamp without loading the object,
+        or None if the model doesn't have the field.
+        """
+        queryset = self.get_queryset()
+        field = self.modified_field_name
+        if not field or _resolve_field(queryset.model, field) is None:
+            return None
+        # get_object() finds the row from the URL (or raises Http404) as usual.
+        return self.get_object(queryset.values_list(field, flat=True))
+
+    def get_object_etag(self, modified):
+        user = getattr(self.request, "user", None)
+        parts = [
+            self.request.path,
+            modified.isoformat(),
+            str(getattr(user, "pk", None)),
+        ]
+        return hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, request, *args, **kwargs):
+        modified = self.get_object_modified()
+        # Anything queued (e.g. by a failed change) would be lost with a 304.
+        if modified is None or len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        etag = self.get_object_etag(modified)
+        return condition(
+            etag_func=lambda *args, **kwargs: etag,
+            last_modified_func=lambda *args, **kwargs: modified,
+        )(super().get)(request, *args, **kwargs)
+
+
+def auto_now_values(model):
+    """
+    Returns a dict of the model's auto_now fields set to the current time,
+    for use with queryset.update() which doesn't set them.
+    """
+    now = timezone.now()
+    return dict(
+        (field.name, now if isinstance(field, DateTimeField) else now.date())
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False)
+    )
+
+
 class SetModelFieldMixin:
     """
     Mixin that can be used to set a value on a detail view (i.e. the view must
     have a self.get_object() function) on POST.
+
+    Only the field (and any auto_now fields) is saved. Set `check_modified`
+    to only save if the object's `modified` timestamp (see TimeStampedModel)
+    matches the one POSTed as `modified`, i.e. nobody else changed it since
+    the confirmation page was shown. A POST without a valid `modified` is
+    then rejected with a 400 response.
+
+    With ConditionalObjectMixin (as in SetModelFieldView) a POST may instead
+    send the ETag of the confirmation page in an If-Match header, and gets a
+    412 response rather than a redirect if the object has changed since.
     """
 
     success_url = None
+    check_modified = False
+    modified_field_name = "modified"
+    value_conflict = False
 
     def get_success_url(self):
         if self.success_url:
@@ -280,11 +1125,151 @@ class SetModelFieldMixin:
         except AttributeError:
             raise ImproperlyConfigured("No value provided.")
 
+    def get_expected_modified(self):
+        """
+        Returns the `modified` timestamp POSTed with the form, or None.
+        """
+        value = self.request.POST.get(self.modified_field_name)
+        if not value:
+            return None
+        try:
+            return parse_datetime(value)
+        except ValueError:
+            return None
+
+    def get_conflict_url(self):
+        # Show the confirmation page again so the user sees the new values.
+        return self.request.get_full_path()
+
+    def get_if_match_modified(self):
+        """
+        Returns the object's `modified` timestamp if the request has an
+        If-Match header naming its current ETag, None if there's no header to
+        check and False if it doesn't match.
+        """
+        if_match = self.request.META.get("HTTP_IF_MATCH")
+        get_object_etag = getattr(self, "get_object_etag", None)
+        if not if_match or get_object_etag is None:
+            return None
+        etags = parse_etags(if_match)
+        if "*" in etags:
+            return None
+        modified = getattr(self.object, self.modified_field_name, None)
+        if modified is None or get_object_etag(modified) not in etags:
+            return False
+        return modified
+
     def set_value(self, *args, **kwargs):
         self.object = self.get_object()
-        setattr(self.object, self.get_field(), self.get_value())
-        self.object.save()
+        field = self.get_field()
+        value = self.get_value()
+        expected = None
+        if_match = self.get_if_match_modified()
+        if if_match is False:
+            self.value_conflict = True
+            return HttpResponse(status=412)
+        if if_match is not None:
+            expected = if_match
+        elif self.check_modified:
+            expected = self.get_expected_modified()
+            if expected is None:
+                return HttpResponseBadRequest("Missing or invalid modified timestamp.")
+
+        if expected is None:
+            setattr(self.object, field, value)
+            update_fields = [field] + list(auto_now_values(self.object.__class__))
+            self.object.save(update_fields=update_fields)
+            return HttpResponseRedirect(self.get_success_url())
+
+        # Only update the row if it hasn't changed since the form was shown.
+        model = self.object.__class__
+        values = dict(auto_now_values(model), **{field: value})
+        qs = model._default_manager.filter(pk=self.object.pk)
+        updated = qs.filter(**{self.modified_field_name: expected}).update(**values)
+        invalidate_list_cache(model)
+        if not updated:
+            self.value_conflict = True
+            if if_match is not None:
+                # Changed between the If-Match check and the UPDATE.
+                return HttpResponse(status=412)
+            return HttpResponseRedirect(self.get_conflict_url())
+        for name, value in values.items():
+            setattr(self.object, name, value)
         return HttpResponseRedirect(self.get_success_url())
 
     def post(self, *args, **kwargs):
         return self.set_value(*args, **kwargs)
+
+
+class BulkSetModelFieldMixin(SetModelFieldMixin):
+    """
+    Sets a value on many objects at once with a single UPDATE query. The
+    objects are those from `get_queryset()` whose primary keys are sent as
+    `pk` (repeated for each object), or all of them if `all` is sent.
+
+    With `check_modified` set, objects modified after the POSTed `modified`
+    timestamp (e.g. when the list was shown) are skipped, and a POST without
+    a valid `modified` is rejected. The number of objects updated and
+    skipped is available in `set_values_summary`. Primary keys that aren't
+    valid for the model get a 400 response.
+    """
+
+    pk_field_name = "pk"
+    all_field_name = "all"
+    set_values_summary = None
+
+    def get_data(self):
+        return self.request.POST if self.request.method == "POST" else self.request.GET
+
+    def get_pks(self, model):
+        """
+        Returns the primary keys sent, converted by the model's primary key
+        field. Raises ValidationError if one isn't valid.
+        """
+        pk_field = model._meta.pk
+        return [
+            pk_field.to_python(pk) for pk in self.get_data().getlist(self.pk_field_name)
+        ]
+
+    def get_bulk_queryset(self):
+        qs = self.get_queryset()
+        if self.get_data().get(self.all_field_name):
+            return qs
+        pks = self.get_pks(qs.model)
+        if not pks:
+            return qs.none()
+        return qs.filter(pk__in=pks)
+
+    def get(self, request, *args, **kwargs):
+        # The confirmation page, listing the objects that will be changed.
+        try:
+            self.object_list = self.get_bulk_queryset()
+        except ValidationError:
+            return HttpResponseBadRequest("Invalid primary key.")
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+    def set_values(self, *args, **kwargs):
+        try:
+            qs = self.get_bulk_queryset()
+        except ValidationError:
+            return HttpResponseBadRequest("Invalid primary key.")
+        values = dict(auto_now_values(qs.model), **{self.get_field(): self.get_value()})
+
+        skipped = 0
+        if self.check_modified:
+            expected = self.get_expected_modified()
+            if expected is None:
+                return HttpResponseBadRequest("Missing or invalid modified timestamp.")
+            # Only rows that exist (and are in the queryset) count as skipped.
+            changed = qs.filter(**{self.modified_field_name + "__gt": expected})
+            skipped = changed.count()
+            qs = qs.filter(**{self.modified_field_name + "__lte": expected})
+
+        updated = qs.update(**values)
+        invalidate_list_cache(qs.model)
+        self.set_values_summary = {"updated": updated, "skipped": skipped}
+        return HttpResponseRedirect(self.get_success_url())
+
+    def post(self, *args, **kwargs):
+        return self.set_values(*args, **kwargs)
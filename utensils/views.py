@@ -1,15 +1,45 @@
-from django.views.generic import ListView
+from django.http import JsonResponse
+from django.views.generic import ListView, View
 from django.views.generic.detail import (
     BaseDetailView,
     SingleObjectTemplateResponseMixin,
 )
+from django.views.generic.list import (
+    MultipleObjectMixin,
+    MultipleObjectTemplateResponseMixin,
+)
 
-from .viewmixins import OrderByMixin, PaginateMixin, SearchFormMixin, SetModelFieldMixin
+from .cache import LRUCache
+from .search import IContainsSearchBackend, spans_multi_valued_relation
+from .viewmixins import (
+    BulkSetModelFieldMixin,
+    ConditionalObjectMixin,
+    ExportMixin,
+    FacetMixin,
+    OrderByMixin,
+    PaginateMixin,
+    PjaxMixin,
+    RelatedFieldsMixin,
+    SearchFormMixin,
+    SetModelFieldMixin,
+)
 
 
-class BaseListView(PaginateMixin, OrderByMixin, SearchFormMixin, ListView):
+class BaseListView(
+    PaginateMixin,
+    OrderByMixin,
+    FacetMixin,
+    SearchFormMixin,
+    ExportMixin,
+    PjaxMixin,
+    RelatedFieldsMixin,
+    ListView,
+):
     """
-    Defines a base list view that supports pagination, ordering and basic search.
+    Defines a base list view that supports pagination, ordering, basic search
+    and facets, loading related objects with the page (see RelatedFieldsMixin),
+    exporting the whole list (see ExportMixin) and PJAX fragments and
+    conditional GETs (see PjaxMixin).
 
     Supports a filter description that can be used in templates:
 
@@ -42,9 +72,10 @@ class BaseListView(PaginateMixin, OrderByMixin, SearchFormMixin, ListView):
         return data
 
 
-class BaseSetModelFieldView(SetModelFieldMixin, BaseDetailView):
+class BaseSetModelFieldView(ConditionalObjectMixin, SetModelFieldMixin, BaseDetailView):
     """
-    Base view for setting a single value on a model instance.
+    Base view for setting a single value on a model instance. The
+    confirmation page answers conditional GETs (see ConditionalObjectMixin).
 
     Using this base class requires subclassing to provide a response mixin.
     """
@@ -59,3 +90,139 @@ class SetModelFieldView(BaseSetModelFieldView, SingleObjectTemplateResponseMixin
         * `field` or `get_field()` - string containing the field name to alter
         * `value` or `get_value()` - the value to set the field to
     """
+
+
+class BaseBulkSetModelFieldView(
+    SearchFormMixin, BulkSetModelFieldMixin, MultipleObjectMixin, View
+):
+    """
+    Base view for setting a single value on many model instances with one
+    UPDATE query.
+
+    Using this base class requires subclassing to provide a response mixin.
+    """
+
+    # Never fall back to every object when a search finds nothing.
+    search_fallback = False
+
+
+class BulkSetModelFieldView(
+    BaseBulkSetModelFieldView, MultipleObjectTemplateResponseMixin
+):
+    """
+    View for setting a single value on the objects whose primary keys are
+    given as `pk` parameters, or all of the (searched) list if `all` is
+    given. GET should be used for a confirmation view listing the objects
+    and the value will be set on POST.
+
+    Required class settings:
+        * `field` or `get_field()` - string containing the field name to alter
+        * `value` or `get_value()` - the value to set the field to
+    """
+
+    # Don't pick up the model's list template by default.
+    template_name_suffix = "_confirm_bulk"
+
+
+class AutocompleteView(View):
+    """
+    JSON endpoint for search-as-you-type, returning the first few objects
+    with a search field starting with the `term` parameter:
+
+        url(r"^books/autocomplete/$", AutocompleteView.as_view(
+            list_view=BookListView, fields=["pk", "title"]), name="book_autocomplete")
+
+        GET /books/autocomplete/?term=gre
+        {"results": [{"pk": 7, "title": "Great Expectations"}, ...]}
+
+    The model and `search_fields` are taken from `list_view` unless set on
+    the view. Only `fields` (by default the primary key and the search
+    fields) are fetched, with values_list() and a LIMIT. Results are kept in
+    an in-process LRU cache for `cache_timeout` seconds; override
+    get_cache_key() if get_queryset() depends on the user.
+    """
+
+    list_view = None
+    model = None
+    queryset = None
+    search_fields = None
+    fields = None
+    lookup = "istartswith"
+    term_kwarg = "term"
+    min_length = 1
+    limit = 10
+    cache_size = 1000
+    cache_timeout = 30
+
+    def get_queryset(self):
+        queryset = self.queryset
+        if queryset is None and self.model is None and self.list_view is not None:
+            queryset = self.list_view.queryset
+        if queryset is not None:
+            return queryset.all()
+        model = self.model or self.list_view.model
+        return model._default_manager.all()
+
+    def get_search_fields(self):
+        if self.search_fields is not None:
+            return list(self.search_fields)
+        return list(self.list_view.search_fields)
+
+    def get_fields(self):
+        if self.fields is not None:
+            return list(self.fields)
+        model = self.get_queryset().model
+        # Many valued relations would repeat objects.
+        return ["pk"] + [
+            field
+            for field in self.get_search_fields()
+            if not spans_multi_valued_relation(model, field)
+        ]
+
+    def get_results(self, term):
+        fields = self.get_fields()
+        search_fields = dict((field, self.lookup) for field in self.get_search_fields())
+        queryset = IContainsSearchBackend().filter(
+            self.get_queryset(), search_fields, term
+        )
+        return [
+            dict(zip(fields, row))
+            for row in queryset.values_list(*fields)[: self.limit]
+        ]
+
+    def get_cache(self):
+        # One cache for each view class, made on first use.
+        cache = self.__class__.__dict__.get("_autocomplete_cache")
+        if cache is None:
+            cache = LRUCache(self.cache_size, self.cache_timeout)
+            self.__class__._autocomplete_cache = cache
+        return cache
+
+    def get_cache_key(self, term):
+        if self.lookup.startswith("i"):
+            term = term.lower()
+        # as_view() arguments are set on the instance, not the class, so
+        # include everything that changes the results. The queryset's SQL
+        # covers get_queryset() overrides that filter on the URL.
+        return (
+            self.list_view,
+            self.model,
+            str(self.get_queryset().query),
+            tuple(self.get_search_fields()),
+            self.lookup,
+            tuple(self.get_fields()),
+            self.limit,
+            term,
+        )
+
+    def get(self, request, *args, **kwargs):
+        term = request.GET.get(self.term_kwarg, "").strip()
+        results = []
+        if len(term) >= self.min_length:
+            cache = self.get_cache()
+            key = self.get_cache_key(term)
+            results = cache.get(key)
+            if results is None:
+                results = self.get_results(term)
+                cache.set(key, results)
+        return JsonResponse({"results": results})